@@ -0,0 +1,4 @@
+"""ASGI entry point, e.g. for 'uvicorn asgi:app'."""
+from movie.asgi.asgi import create_asgi_app
+
+app = create_asgi_app()
@@ -0,0 +1,117 @@
+""" Writes synthetic catalogs, in the format of movie/adapters/data, for benchmarks.
+
+The same number of rows and seed always give the same catalog. Run from the repository root, e.g.:
+
+    python -m benchmarks.catalog 100000 benchmarks/data/100000
+"""
+import csv
+import itertools
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+
+GENRES = [
+    'Action', 'Adventure', 'Animation', 'Biography', 'Comedy', 'Crime', 'Drama', 'Family', 'Fantasy', 'History',
+    'Horror', 'Music', 'Musical', 'Mystery', 'Romance', 'Sci-Fi', 'Sport', 'Thriller', 'War', 'Western'
+]
+
+WORDS = [
+    'night', 'city', 'last', 'war', 'love', 'dark', 'star', 'river', 'king', 'ghost', 'summer', 'secret', 'road',
+    'storm', 'heart', 'iron', 'silent', 'lost', 'golden', 'shadow', 'island', 'winter', 'fire', 'dream', 'empire'
+]
+
+FIRST_NAMES = ['Emma', 'Chris', 'Noomi', 'Logan', 'Zoe', 'James', 'Ridley', 'Vin', 'Charlize', 'Bradley', 'Amy', 'Tom']
+LAST_NAMES = ['Stone', 'Pratt', 'Rapace', 'Gunn', 'Scott', 'Diesel', 'Theron', 'Cooper', 'Adams', 'Hardy', 'Lee']
+
+COMMENTS = ['good movie', 'Yeah great', 'Not my thing', 'Loved the soundtrack', 'Too long', 'Watched it twice']
+
+MOVIES_FILE_HEADER = [
+    'Rank', 'Title', 'Genre', 'Description', 'Director', 'Actors', 'Year', 'Runtime (Minutes)', 'Rating', 'Votes',
+    'Revenue (Millions)', 'Metascore'
+]
+
+
+def person_name(number: int) -> str:
+    first = FIRST_NAMES[number % len(FIRST_NAMES)]
+    last = LAST_NAMES[(number // len(FIRST_NAMES)) % len(LAST_NAMES)]
+    return f'{first} {last} {number}'
+
+
+def power_law_cum_weights(n: int, exponent: float = 0.6):
+    # The k-th most popular person is picked with probability proportional to 1 / k ** exponent.
+    return list(itertools.accumulate(1 / (k ** exponent) for k in range(1, n + 1)))
+
+
+def number_of_users(rows: int) -> int:
+    # populate() hashes every user's password, which takes a good fraction of a second each, so users grow slowly.
+    return max(10, rows // 10000)
+
+
+def generate_catalog(path: str, rows: int, seed: int = 235):
+    """ Writes a catalog of rows movies, and as many comments, to path.
+
+    Actors and directors are chosen from pools of rows // 2 and rows // 5 people with a power law, so a few appear
+    in a great many movies and most in a handful.
+    """
+    rng = random.Random(seed)
+    os.makedirs(path, exist_ok=True)
+
+    number_of_actors = max(4, rows // 2)
+    number_of_directors = max(1, rows // 5)
+    actor_weights = power_law_cum_weights(number_of_actors)
+    director_weights = power_law_cum_weights(number_of_directors)
+    actors = range(number_of_actors)
+    directors = range(number_of_directors)
+
+    with open(os.path.join(path, 'Data1000Movies.csv'), 'w', newline='', encoding='utf-8') as movies_file:
+        writer = csv.writer(movies_file)
+        writer.writerow(MOVIES_FILE_HEADER)
+        for rank in range(1, rows + 1):
+            title = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 3))).title()
+            movie_actors = set(rng.choices(actors, cum_weights=actor_weights, k=4))
+            writer.writerow([
+                rank,
+                f'{title} {rank}',
+                ','.join(rng.sample(GENRES, rng.randint(1, 3))),
+                ' '.join(rng.choice(WORDS) for _ in range(20)).capitalize() + '.',
+                person_name(rng.choices(directors, cum_weights=director_weights)[0]),
+                ', '.join(person_name(actor) for actor in sorted(movie_actors)),
+                rng.randint(2006, 2016),
+                rng.randint(66, 191),
+                round(rng.uniform(1.9, 9.0), 1),
+                rng.randint(61, 1791916),
+                round(rng.uniform(0, 936.63), 2),
+                rng.randint(11, 100)
+            ])
+
+    users = number_of_users(rows)
+    with open(os.path.join(path, 'users.csv'), 'w', newline='', encoding='utf-8') as users_file:
+        writer = csv.writer(users_file)
+        writer.writerow(['id', 'username', 'password'])
+        for user_id in range(1, users + 1):
+            writer.writerow([user_id, f'user{user_id}', f'Password{user_id}'])
+
+    start = datetime(2020, 1, 1)
+    with open(os.path.join(path, 'comments.csv'), 'w', newline='', encoding='utf-8') as comments_file:
+        writer = csv.writer(comments_file)
+        writer.writerow(['id', 'user-id', 'movie-id', 'comment-text', 'timestamp'])
+        for comment_id in range(1, rows + 1):
+            timestamp = start + timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+            writer.writerow([
+                comment_id, rng.randint(1, users), rng.randint(1, rows), rng.choice(COMMENTS),
+                timestamp.isoformat(sep=' ')
+            ])
+
+
+def catalog_path(rows: int, directory: str = os.path.join('benchmarks', 'data')) -> str:
+    """ Returns the path of the synthetic catalog of the given size, generating it the first time it's asked for. """
+    path = os.path.join(directory, str(rows))
+    if not os.path.exists(os.path.join(path, 'comments.csv')):
+        generate_catalog(path, rows)
+    return path
+
+
+if __name__ == '__main__':
+    generate_catalog(sys.argv[2], int(sys.argv[1]))
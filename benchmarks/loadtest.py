@@ -0,0 +1,252 @@
+""" Replays a mix of requests against the app at a fixed concurrency and reports throughput and latency per route.
+
+Run from the repository root, e.g.:
+
+    python -m benchmarks.loadtest --concurrency 8 --duration 30 --mix home=1,movies=6,api=2,comment=1
+    python -m benchmarks.loadtest --rows 100000 --output loadtest.json
+
+The app is started on a local threaded WSGI server in a separate process, against movie/adapters/data, a data
+directory given with --data, or a synthetic catalog of --rows movies. Pass --url to load an already running server
+instead. Comment posts log in as users from the data directory's users.csv.
+"""
+import argparse
+import csv
+import http.cookiejar
+import json
+import logging
+import math
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+
+ROUTES = ('home', 'movies', 'api', 'comment')
+
+
+def serve(data_path: str, port: int, rate_limit: bool):
+    # Runs in the server process.
+    from werkzeug.serving import make_server
+    from movie import create_app
+
+    # A line per request would cost the server more than some of the requests.
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    app = create_app({
+        'TEST_DATA_PATH': data_path,
+        'SECRET_KEY': 'loadtest',
+        # Clients post comments without first fetching the form's CSRF token.
+        'WTF_CSRF_ENABLED': False,
+        'RATE_LIMIT_ENABLED': rate_limit
+    })
+    make_server('127.0.0.1', port, app, threaded=True).serve_forever()
+
+
+def read_catalog(data_path: str):
+    """ Returns the genre, actor and director names, the movie ids and the (username, password) pairs in the data. """
+    names = {'genre': set(), 'actor': set(), 'director': set()}
+    movie_ids = list()
+    with open(os.path.join(data_path, 'Data1000Movies.csv'), encoding='utf-8-sig') as movies_file:
+        reader = csv.reader(movies_file)
+        next(reader)
+        for row in reader:
+            movie_ids.append(int(row[0]))
+            names['genre'].update(name.strip() for name in row[2].split(','))
+            names['actor'].update(name.strip() for name in row[5].split(','))
+            names['director'].add(row[4].strip())
+
+    with open(os.path.join(data_path, 'users.csv'), encoding='utf-8-sig') as users_file:
+        reader = csv.reader(users_file)
+        next(reader)
+        users = [(row[1].strip(), row[2].strip()) for row in reader]
+
+    return {facet: sorted(values) for facet, values in names.items()}, movie_ids, users
+
+
+class Client:
+    """ One simulated user, with its own session cookie. """
+
+    def __init__(self, base_url: str, catalog, rng: random.Random):
+        self._base_url = base_url
+        self._names, self._movie_ids, self._users = catalog
+        self._rng = rng
+        self._opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def request(self, route: str):
+        """ Makes one request for the route and returns its status code. """
+        if route == 'home':
+            return self._open('/')
+        if route == 'movies':
+            facet = self._rng.choice(('genre', 'genre', 'actor', 'director'))
+            return self._open('/movies_by_genre?' + urllib.parse.urlencode({facet: self._choose_name(facet)}))
+        if route == 'api':
+            return self._open('/api/movies?' + urllib.parse.urlencode({'genre': self._choose_name('genre')}))
+        if route == 'comment':
+            movie_id = self._rng.choice(self._movie_ids)
+            return self._open('/comment_on_movie', {'movie_id': movie_id, 'comment': f'Load test comment {movie_id}'})
+        raise ValueError(f'Unknown route: {route}')
+
+    def _choose_name(self, facet: str):
+        return self._rng.choice(self._names[facet])
+
+    def log_in(self):
+        username, password = self._rng.choice(self._users)
+        self._open('/authentication/login', {'username': username, 'password': password})
+
+    def _open(self, path: str, form: dict = None):
+        data = urllib.parse.urlencode(form).encode('ascii') if form is not None else None
+        try:
+            with self._opener.open(self._base_url + path, data=data, timeout=60) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    # Nearest-rank percentile.
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values), max(1, math.ceil(fraction * len(sorted_values)))) - 1
+    return sorted_values[index]
+
+
+def summarise(latencies: dict, errors: dict, elapsed: float) -> dict:
+    routes = dict()
+    for route, values in latencies.items():
+        values = sorted(values)
+        routes[route] = {
+            'requests': len(values),
+            'errors': errors.get(route, 0),
+            'throughput_rps': len(values) / elapsed,
+            'mean_ms': 1000 * sum(values) / len(values),
+            'p50_ms': 1000 * percentile(values, 0.50),
+            'p95_ms': 1000 * percentile(values, 0.95),
+            'p99_ms': 1000 * percentile(values, 0.99),
+            'max_ms': 1000 * values[-1]
+        }
+
+    total_requests = sum(route['requests'] for route in routes.values())
+    return {
+        'elapsed_seconds': elapsed,
+        'requests': total_requests,
+        'errors': sum(errors.values()),
+        'throughput_rps': total_requests / elapsed,
+        'routes': routes
+    }
+
+
+def run_load(base_url: str, catalog, mix: dict, concurrency: int, duration: float, seed: int = 235) -> dict:
+    routes = list(mix)
+    weights = [mix[route] for route in routes]
+    latencies = {route: list() for route in routes}
+    errors = dict()
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def simulate(worker: int):
+        rng = random.Random(seed + worker)
+        client = Client(base_url, catalog, rng)
+        # Logging in isn't timed; the comment posts are.
+        if 'comment' in mix:
+            client.log_in()
+        while time.monotonic() < deadline:
+            route = rng.choices(routes, weights)[0]
+            started = time.perf_counter()
+            status = client.request(route)
+            latency = time.perf_counter() - started
+            with lock:
+                latencies[route].append(latency)
+                if status >= 400:
+                    errors[route] = errors.get(route, 0) + 1
+
+    started = time.monotonic()
+    workers = [threading.Thread(target=simulate, args=(worker,)) for worker in range(concurrency)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    return summarise({route: values for route, values in latencies.items() if values}, errors,
+                     time.monotonic() - started)
+
+
+def wait_until_ready(base_url: str, timeout: float):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(base_url + '/readyz', timeout=5) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError(f'The server at {base_url} did not become ready within {timeout} seconds')
+        time.sleep(0.5)
+
+
+def parse_mix(text: str) -> dict:
+    mix = dict()
+    for part in text.split(','):
+        route, _, weight = part.partition('=')
+        if route not in ROUTES:
+            raise argparse.ArgumentTypeError(f'Unknown route {route}; choose from {", ".join(ROUTES)}')
+        mix[route] = float(weight or 1)
+    return mix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data', default=os.path.join('movie', 'adapters', 'data'), help='data directory to serve')
+    parser.add_argument('--rows', type=int, help='serve a synthetic catalog of this many movies instead')
+    parser.add_argument('--url', help='load an already running server instead of starting one')
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--mix', type=parse_mix, default='home=1,movies=6,api=2,comment=1',
+                        help='routes to request and their weights')
+    parser.add_argument('--concurrency', type=int, default=8, help='number of simulated clients')
+    parser.add_argument('--duration', type=float, default=30, help='seconds to run for')
+    parser.add_argument('--rate-limit', action='store_true', help="keep the app's rate limits")
+    parser.add_argument('--output', help='file to write the report to, as JSON')
+    args = parser.parse_args(argv)
+
+    data_path = args.data
+    if args.rows:
+        from benchmarks.catalog import catalog_path
+        data_path = catalog_path(args.rows)
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        base_url = f'http://127.0.0.1:{args.port}'
+        server = multiprocessing.Process(target=serve, args=(data_path, args.port, args.rate_limit), daemon=True)
+        server.start()
+
+    try:
+        wait_until_ready(base_url, timeout=600)
+        report = run_load(base_url.rstrip('/'), read_catalog(data_path), args.mix, args.concurrency, args.duration)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.join()
+
+    report['config'] = {
+        'data': data_path,
+        'mix': args.mix,
+        'concurrency': args.concurrency,
+        'duration': args.duration
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as output:
+            output.write(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
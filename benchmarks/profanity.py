@@ -0,0 +1,46 @@
+""" Compares the compiled profanity filter with better_profanity on comments of increasing length.
+
+Run from the repository root:
+
+    python -m benchmarks.profanity
+"""
+import time
+import timeit
+
+from better_profanity import profanity
+
+from movie.movies.profanity import get_profanity_filter
+
+
+SENTENCE = 'A gripping film with a fine cast, though the second act drags on for far too long. '
+
+
+def comments(length: int):
+    clean = (SENTENCE * (length // len(SENTENCE) + 1))[:length]
+    # Profanity at the end means the whole comment is read either way.
+    return {'clean': clean, 'profane': clean[:-10] + ' sh1t film'}
+
+
+def best_time(check, comment: str, number: int) -> float:
+    return min(timeit.repeat(lambda: check(comment), number=number, repeat=5)) / number
+
+
+def main():
+    # The filter is compiled the first time it's asked for.
+    started = time.perf_counter()
+    profanity_filter = get_profanity_filter()
+    print(f'Compiled filter in {time.perf_counter() - started:.2f}s, {profanity_filter.number_of_states} states\n')
+
+    print(f'{"length":>8} {"comment":>8} {"better_profanity":>18} {"compiled":>12} {"speedup":>8}')
+    for length in (100, 1000, 10000):
+        number = max(10000 // length, 3)
+        for kind, comment in comments(length).items():
+            assert profanity.contains_profanity(comment) == profanity_filter.contains_profanity(comment)
+
+            before = best_time(profanity.contains_profanity, comment, number)
+            after = best_time(profanity_filter.contains_profanity, comment, number)
+            print(f'{length:>8} {kind:>8} {before * 1e6:>16.1f}us {after * 1e6:>10.1f}us {before / after:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+""" Times MemoryRepository operations on synthetic catalogs of increasing size, and compares results between commits.
+
+Run from the repository root, e.g.:
+
+    python -m benchmarks.repository --rows 1000 100000 --output before.json
+    python -m benchmarks.repository --rows 1000 100000 --output after.json --compare before.json
+
+Catalogs are generated by benchmarks.catalog the first time each size is used, into benchmarks/data. A 1,000,000 row
+catalog takes several minutes to generate and populate.
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+
+from movie.adapters.memory_repository import MemoryRepository, populate
+from movie.domain.model import make_review
+
+from benchmarks.catalog import catalog_path, number_of_users
+
+
+def best_time_per_call(function, args_list, repeat: int = 5) -> float:
+    """ Returns the best, over repeat runs, of the mean seconds each call of function(*args) takes. """
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for args in args_list:
+            function(*args)
+        best = min(best, (time.perf_counter() - started) / len(args_list))
+    return best
+
+
+def benchmark_repository(rows: int, calls: int = 1000, seed: int = 235) -> dict:
+    """ Returns the seconds each benchmarked operation takes on the catalog of the given size. """
+    rng = random.Random(seed)
+    path = catalog_path(rows)
+    results = dict()
+
+    repo = MemoryRepository()
+    started = time.perf_counter()
+    populate(path, repo)
+    results['populate'] = time.perf_counter() - started
+
+    movie_ids = [rng.randint(1, rows) for _ in range(calls)]
+    genres = [genre.genre_name for genre in repo.get_genres()]
+    # Popular and obscure people alike, in proportion to how often they're linked to.
+    actors = [rng.choice(list(repo.get_movie(movie_id).actors)).actor_name for movie_id in movie_ids]
+    directors = [next(repo.get_movie(movie_id).directors).director_name for movie_id in movie_ids]
+    usernames = [f'user{rng.randint(1, number_of_users(rows))}' for _ in range(calls)]
+
+    results['get_movie'] = best_time_per_call(repo.get_movie, [(movie_id,) for movie_id in movie_ids])
+    results['get_movies_by_id'] = best_time_per_call(
+        repo.get_movies_by_id, [(movie_ids[i:i + 30],) for i in range(0, calls, 30)]
+    )
+    results['get_movie_ids_for_genre'] = best_time_per_call(
+        repo.get_movie_ids_for_genre, [(genre,) for genre in genres], repeat=3
+    )
+    results['get_movie_ids_for_actor'] = best_time_per_call(repo.get_movie_ids_for_actor, [(a,) for a in actors])
+    results['get_movie_ids_for_director'] = best_time_per_call(
+        repo.get_movie_ids_for_director, [(director,) for director in directors]
+    )
+    results['get_movie_id_index_genre'] = best_time_per_call(
+        repo.get_movie_id_index, [('genre', genre) for genre in genres]
+    )
+    results['get_user'] = best_time_per_call(repo.get_user, [(username,) for username in usernames])
+
+    # Adding comments changes the repository, so it's timed last, and once.
+    users = [repo.get_user(username) for username in usernames]
+    movies = [repo.get_movie(movie_id) for movie_id in movie_ids]
+    results['add_review'] = best_time_per_call(
+        lambda user, movie: repo.add_review(make_review('Benchmark comment', user, movie)),
+        list(zip(users, movies)), repeat=1
+    )
+
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """ Returns a line for each operation timed in both results, flagging those slower than the baseline by more than
+    threshold, e.g. 0.25 for 25%.
+    """
+    lines = list()
+    for rows, timings in results['benchmarks'].items():
+        for name, seconds in timings.items():
+            before = baseline['benchmarks'].get(rows, {}).get(name)
+            if before is None:
+                continue
+            ratio = seconds / before
+            flag = '  REGRESSION' if ratio > 1 + threshold else ''
+            lines.append(f'{rows:>8} {name:<28} {before * 1e6:>12.2f}us {seconds * 1e6:>12.2f}us {ratio:>6.2f}x{flag}')
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100000], help='catalog sizes to benchmark')
+    parser.add_argument('--output', help='file to write the results to, as JSON')
+    parser.add_argument('--compare', help='results file of an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.25, help='slowdown reported as a regression')
+    args = parser.parse_args(argv)
+
+    results = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'benchmarks': dict()
+    }
+    for rows in args.rows:
+        timings = benchmark_repository(rows)
+        results['benchmarks'][str(rows)] = timings
+        for name, seconds in timings.items():
+            print(f'{rows:>8} {name:<28} {seconds * 1e6:>14.2f}us')
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        lines = compare(results, baseline, args.threshold)
+        print(f'\nCompared with {baseline.get("commit")}:')
+        print('\n'.join(lines))
+        if any(line.endswith('REGRESSION') for line in lines):
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -15,3 +15,113 @@ class Config:
 
     SECRET_KEY = environ.get('SECRET_KEY')
 
+    # Maximum number of rendered template fragments, e.g. the search sidebar, kept in memory.
+    FRAGMENT_CACHE_SIZE = int(environ.get('FRAGMENT_CACHE_SIZE', 256))
+
+    # Whole-page cache for anonymous-heavy pages. RESPONSE_CACHE_TTL maps endpoints to seconds to keep their pages.
+    RESPONSE_CACHE_ENABLED = environ.get('RESPONSE_CACHE_ENABLED', 'True') == 'True'
+    RESPONSE_CACHE_SIZE = int(environ.get('RESPONSE_CACHE_SIZE', 512))
+    RESPONSE_CACHE_TTL = {
+        'home_bp.home': int(environ.get('RESPONSE_CACHE_TTL_HOME', 300)),
+        'movies_bp.movies_by_genre': int(environ.get('RESPONSE_CACHE_TTL_MOVIES', 60))
+    }
+
+    # Number of movies on a listing page when a client doesn't choose, and the most it may choose with per_page.
+    MOVIES_PER_PAGE = int(environ.get('MOVIES_PER_PAGE', 3))
+    MAX_MOVIES_PER_PAGE = int(environ.get('MAX_MOVIES_PER_PAGE', 30))
+
+    # Number of comments shown at a time for a movie on a listing page, and returned by the comments API by default.
+    COMMENTS_PER_PAGE = int(environ.get('COMMENTS_PER_PAGE', 10))
+
+    # Number of movies looked up and serialized at a time when streaming an export.
+    EXPORT_BATCH_SIZE = int(environ.get('EXPORT_BATCH_SIZE', 100))
+
+    # Number of movies returned by a JSON API page when a client doesn't ask for a limit, and the most it may ask for.
+    API_PAGE_SIZE = int(environ.get('API_PAGE_SIZE', 20))
+    API_MAX_PAGE_SIZE = int(environ.get('API_MAX_PAGE_SIZE', 100))
+
+    # Most movie ids a client can ask for in one POST /api/movies:batchGet.
+    API_MAX_BATCH_SIZE = int(environ.get('API_MAX_BATCH_SIZE', 500))
+
+    # Gzip responses of these types when they're at least COMPRESSION_MIN_SIZE bytes. Static files are served from
+    # variants written by 'flask precompress-static' instead.
+    COMPRESSION_ENABLED = environ.get('COMPRESSION_ENABLED', 'True') == 'True'
+    COMPRESSION_MIN_SIZE = int(environ.get('COMPRESSION_MIN_SIZE', 500))
+    COMPRESSION_LEVEL = int(environ.get('COMPRESSION_LEVEL', 6))
+    COMPRESSION_MIMETYPES = [
+        'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript', 'application/javascript',
+        'application/json', 'application/x-ndjson', 'image/svg+xml'
+    ]
+
+    # Number of threads running Flask views when the app is served through asgi.py.
+    ASGI_WORKER_THREADS = int(environ.get('ASGI_WORKER_THREADS', 8))
+
+    # Directory for compiled templates shared by workers; 'flask precompile-templates' fills it at build time.
+    # TEMPLATE_WARMUP loads every template when the app is created instead of on first use.
+    TEMPLATE_BYTECODE_CACHE_DIR = environ.get('TEMPLATE_BYTECODE_CACHE_DIR')
+    TEMPLATE_WARMUP = environ.get('TEMPLATE_WARMUP', 'False') == 'True'
+
+    # Populate the repository on a background thread so the app can answer /healthz straight away. Other routes
+    # answer 503, asking clients to retry after NOT_READY_RETRY_AFTER seconds, until /readyz reports ready.
+    BACKGROUND_POPULATE = environ.get('BACKGROUND_POPULATE', 'False') == 'True'
+    NOT_READY_RETRY_AFTER = int(environ.get('NOT_READY_RETRY_AFTER', 5))
+
+    # Set when the app is created once in a pre-forking server's master process, e.g. 'gunicorn --preload', so that
+    # the catalog is populated up front and frozen, and forked workers share its memory copy-on-write.
+    PRELOAD_FREEZE = environ.get('PRELOAD_FREEZE', 'False') == 'True'
+
+    # Lock the in-memory repository so it can be shared by a threaded server's request threads. Readers share the
+    # lock; adding users, comments and catalog entries takes it alone.
+    REPOSITORY_THREAD_SAFE = environ.get('REPOSITORY_THREAD_SAFE', 'True') == 'True'
+
+    # Passwords are hashed and checked by at most KDF_WORKERS threads, with up to KDF_MAX_QUEUE more requests waiting;
+    # further logins and registrations answer 503, asking clients to retry after KDF_RETRY_AFTER seconds.
+    # PASSWORD_HASH_METHOD sets the cost of new hashes, e.g. 'pbkdf2:sha256:260000' for 260000 iterations.
+    KDF_WORKERS = int(environ.get('KDF_WORKERS', 2))
+    KDF_MAX_QUEUE = int(environ.get('KDF_MAX_QUEUE', 16))
+    KDF_RETRY_AFTER = int(environ.get('KDF_RETRY_AFTER', 1))
+    PASSWORD_HASH_METHOD = environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:150000')
+
+    # Time the phases of each request, e.g. filtering, fetching movies, building the sidebar and rendering, and report
+    # them in a Server-Timing response header and an INFO log line of JSON from movie.diagnostics.timing.
+    SERVER_TIMING_ENABLED = environ.get('SERVER_TIMING_ENABLED', 'False') == 'True'
+
+    # Serve request, repository, cache and rate limiter metrics at /metrics in the Prometheus text format.
+    METRICS_ENABLED = environ.get('METRICS_ENABLED', 'True') == 'True'
+
+    # Administrators, who can use the diagnostics endpoints and profiler: users logged in with one of the
+    # comma-separated ADMIN_USERNAMES, and clients sending ADMIN_TOKEN in an X-Admin-Token header.
+    ADMIN_USERNAMES = [name.strip() for name in environ.get('ADMIN_USERNAMES', '').split(',') if name.strip()]
+    ADMIN_TOKEN = environ.get('ADMIN_TOKEN')
+
+    # Let administrators profile a single request with cProfile by adding ?profile=1 or an X-Profile header. The
+    # stats are written to PROFILE_DIR.
+    PROFILING_ENABLED = environ.get('PROFILING_ENABLED', 'False') == 'True'
+    PROFILE_DIR = environ.get('PROFILE_DIR', 'profiles')
+
+    # Trace memory allocated while the app is created with tracemalloc, so that each phase of starting up reports it.
+    # Slows starting up down.
+    STARTUP_TRACE_MEMORY = environ.get('STARTUP_TRACE_MEMORY', 'False') == 'True'
+
+    # Token bucket budgets, per client IP address and per logged in user, as (requests a second, burst) for each
+    # endpoint, or (method, endpoint) to only limit one method. Clients over budget get 429. CONCURRENCY_LIMITS caps the requests in progress for each endpoint;
+    # further requests get 503 straight away.
+    RATE_LIMIT_ENABLED = environ.get('RATE_LIMIT_ENABLED', 'True') == 'True'
+    RATE_LIMITS = {
+        'movies_bp.movies_by_genre': (
+            float(environ.get('RATE_LIMIT_MOVIES_RATE', 5)), int(environ.get('RATE_LIMIT_MOVIES_BURST', 30))
+        ),
+        'movies_bp.export_movies_by_genre': (
+            float(environ.get('RATE_LIMIT_EXPORT_RATE', 0.1)), int(environ.get('RATE_LIMIT_EXPORT_BURST', 3))
+        ),
+        ('POST', 'authentication_bp.login'): (
+            float(environ.get('RATE_LIMIT_LOGIN_RATE', 0.2)), int(environ.get('RATE_LIMIT_LOGIN_BURST', 10))
+        )
+    }
+    # Where the token buckets are kept: an AbstractBucketStore, e.g. one shared by worker processes, or None for a
+    # MemoryBucketStore in each process. Set it in the config mapping passed to create_app.
+    RATE_LIMIT_STORE = None
+    CONCURRENCY_LIMITS = {
+        'movies_bp.movies_by_genre': int(environ.get('CONCURRENCY_LIMIT_MOVIES', 16)),
+        'movies_bp.export_movies_by_genre': int(environ.get('CONCURRENCY_LIMIT_EXPORT', 2))
+    }
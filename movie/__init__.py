@@ -5,12 +5,30 @@ import os
 from flask import Flask
 
 import movie.adapters.repository as repo
-from movie.adapters.memory_repository import MemoryRepository, populate
+from movie.adapters.memory_repository import MemoryRepository
+from movie.adapters.loader import CatalogLoader
+from movie.health.health import require_catalog
+from movie.caching.fragment import init_fragment_cache
+from movie.caching.templates import init_template_cache
+from movie.caching.response_cache import init_response_cache
+from movie.compression.compression import init_compression
+from movie.preload.preload import init_preload
+from movie.authentication.kdf import init_kdf_pool
+from movie.ratelimit.ratelimit import init_rate_limiting
+from movie.diagnostics.timing import init_server_timing
+from movie.diagnostics.metrics import init_metrics, init_repository_metrics
+from movie.diagnostics.profiling import init_profiling
+from movie.diagnostics.startup import StartupTimer, init_startup_timer, finish_startup_timer
 
 
 def create_app(test_config=None):
     """Construct the core application."""
 
+    # Time each phase of creating the app. The times are logged at the end and served at /admin/startup. The first
+    # phase includes reading the .env file, when config is first imported.
+    startup = StartupTimer()
+    startup.start_phase('config')
+
     # Create the Flask app object.
     app = Flask(__name__)
 
@@ -24,9 +42,60 @@ def create_app(test_config=None):
         app.config.from_mapping(test_config)
         data_path = app.config['TEST_DATA_PATH']
 
-    # Create the MemoryRepository implementation for a memory-based repository.
-    repo.repo_instance = MemoryRepository()
-    populate(data_path, repo.repo_instance)
+    init_startup_timer(app, startup)
+    startup.start_phase('request_hooks')
+
+    # With SERVER_TIMING_ENABLED, time the phases of each request and report them in a Server-Timing header. Registered
+    # first so that the total covers every other hook.
+    init_server_timing(app)
+
+    # Count and time requests for /metrics, including those answered by the hooks registered below.
+    init_metrics(app)
+
+    # With PROFILING_ENABLED, administrators can have single requests profiled by adding ?profile=1.
+    init_profiling(app)
+
+    startup.start_phase('populate')
+
+    # Create the MemoryRepository implementation for a memory-based repository. It's thread safe unless
+    # REPOSITORY_THREAD_SAFE is turned off for single threaded workers.
+    repo.repo_instance = MemoryRepository(thread_safe=app.config['REPOSITORY_THREAD_SAFE'])
+
+    # Populate the repository, either now or, with BACKGROUND_POPULATE, on a background thread while the app starts
+    # serving health checks. Other routes answer 503 until the repository is ready.
+    loader = CatalogLoader(data_path, repo.repo_instance)
+    app.extensions['catalog_loader'] = loader
+    loader.phase_listeners.append(startup.populate_listener)
+    app.before_request(require_catalog)
+    # A background thread doesn't survive a fork, so a catalog preloaded for forked workers is always loaded now.
+    if app.config['BACKGROUND_POPULATE'] and not app.config['PRELOAD_FREEZE']:
+        loader.start()
+    else:
+        loader.load()
+
+    startup.start_phase('extensions')
+
+    # Time repository operations for /metrics, once the catalog is loaded so that populating isn't counted.
+    loader.when_ready(lambda: init_repository_metrics(app, repo.repo_instance))
+
+    # Hash and check passwords on a bounded pool of threads, answering 503 when it's full.
+    init_kdf_pool(app)
+
+    # Refuse clients over their budget for expensive routes, and requests over a route's concurrency limit, before
+    # any cached page is served.
+    init_rate_limiting(app)
+
+    # Cache rendered template fragments such as the search sidebar.
+    init_fragment_cache(app)
+
+    # Cache whole pages, e.g. movie listings, and replay them to repeated requests.
+    init_response_cache(app)
+
+    # Gzip responses and serve precompressed static files. Registered after the response cache so that pages are
+    # compressed before they're cached.
+    init_compression(app)
+
+    startup.start_phase('blueprints')
 
     # Build the application - these steps require an application context.
     with app.app_context():
@@ -43,4 +112,23 @@ def create_app(test_config=None):
         from .utilities import utilities
         app.register_blueprint(utilities.utilities_blueprint)
 
+        from .api import api
+        app.register_blueprint(api.api_blueprint)
+
+        from .health import health
+        app.register_blueprint(health.health_blueprint)
+
+        from .diagnostics import diagnostics
+        app.register_blueprint(diagnostics.diagnostics_blueprint)
+
+        # Load compiled templates from the bytecode cache, and optionally compile them all now.
+        startup.start_phase('templates')
+        init_template_cache(app)
+
+    # With PRELOAD_FREEZE, prepare the catalog to be shared by workers forked from this process.
+    startup.start_phase('preload')
+    init_preload(app, repo.repo_instance)
+
+    finish_startup_timer(app)
+
     return app
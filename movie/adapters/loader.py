@@ -0,0 +1,111 @@
+import logging
+import threading
+import time
+
+from movie.adapters.memory_repository import MemoryRepository, populate
+
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogLoader:
+    """ Populates a MemoryRepository, either straight away or on a background thread, and reports its progress.
+
+    The loader moves from 'pending' to 'loading' to 'ready', or to 'failed' if populating raises an exception. It
+    records how many seconds each phase of populating took, and calls each of phase_listeners with the name and
+    seconds of a phase when it ends. Callbacks passed to when_ready are called once populating has finished, just
+    before the loader becomes ready.
+    """
+
+    def __init__(self, data_path: str, repo: MemoryRepository):
+        self._data_path = data_path
+        self._repo = repo
+        self._ready = threading.Event()
+        self._ready_lock = threading.Lock()
+        self._ready_listeners = list()
+        self._thread = None
+
+        self.state = 'pending'
+        self.phase = None
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self.phase_seconds = dict()
+        self.phase_listeners = list()
+        self._phase_started = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def load(self):
+        self.state = 'loading'
+        self.started_at = time.time()
+        try:
+            populate(self._data_path, self._repo, on_phase=self._start_phase)
+        except Exception as e:
+            self.state = 'failed'
+            self.error = repr(e)
+            logger.exception('Populating the repository from %s failed', self._data_path)
+            raise
+        finally:
+            self._end_phase()
+            self.finished_at = time.time()
+
+        self.phase = None
+        with self._ready_lock:
+            for listener in self._ready_listeners:
+                listener()
+            self.state = 'ready'
+            self._ready.set()
+
+    def when_ready(self, callback):
+        """ Calls callback once the repository has been populated, straight away if it already has been. """
+        with self._ready_lock:
+            if not self.ready:
+                self._ready_listeners.append(callback)
+                return
+        callback()
+
+    def start(self):
+        """ Populates the repository on a daemon thread and returns straight away. """
+        self._thread = threading.Thread(target=self._load_in_background, name='catalog-loader', daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def status(self) -> dict:
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+
+        return {
+            'state': self.state,
+            'phase': self.phase,
+            'error': self.error,
+            'elapsed_seconds': elapsed,
+            'phase_seconds': dict(self.phase_seconds),
+            'movies': self._repo.get_number_of_movies(),
+            'reviews': self._repo.get_number_of_reviews()
+        }
+
+    def _start_phase(self, phase: str):
+        self._end_phase()
+        self.phase = phase
+        self._phase_started = time.perf_counter()
+
+    def _end_phase(self):
+        if self._phase_started is not None:
+            seconds = time.perf_counter() - self._phase_started
+            self.phase_seconds[self.phase] = seconds
+            self._phase_started = None
+            for listener in self.phase_listeners:
+                listener(self.phase, seconds)
+
+    def _load_in_background(self):
+        try:
+            self.load()
+        except Exception:
+            # Already logged and recorded in the loader's state, which /readyz reports.
+            pass
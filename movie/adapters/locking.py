@@ -0,0 +1,100 @@
+import threading
+from contextlib import contextmanager
+
+
+class ReadWriteLock:
+    """ A lock that any number of readers can hold at once, or one writer can hold alone.
+
+    Waiting writers are given precedence over new readers, so a steady stream of readers doesn't starve them. Both
+    sides are reentrant: a thread holding the lock, for reading or writing, can take it again for reading, and a
+    writer can take it again for writing. A reader can't upgrade to a writer, but a writer that releases the write
+    lock while still reading downgrades to a reader.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._writer_depth = 0
+        self._writers_waiting = 0
+        self._local = threading.local()
+
+    @contextmanager
+    def reading(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def writing(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+    def acquire_read(self):
+        # The thread already holds the lock, so it mustn't wait behind writers that are waiting for it.
+        depth = getattr(self._local, 'read_depth', 0)
+        if depth:
+            self._local.read_depth = depth + 1
+            return
+        if self._writer == threading.get_ident():
+            # Reads taken under the write lock aren't counted in _readers unless the thread downgrades.
+            self._local.read_depth = 1
+            self._local.counted = False
+            return
+
+        with self._condition:
+            while self._writer is not None or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+        self._local.read_depth = 1
+        self._local.counted = True
+
+    def release_read(self):
+        depth = self._local.read_depth - 1
+        self._local.read_depth = depth
+        if depth or not self._local.counted:
+            return
+
+        with self._condition:
+            self._readers -= 1
+            if not self._readers:
+                self._condition.notify_all()
+
+    def acquire_write(self):
+        me = threading.get_ident()
+        if self._writer == me:
+            self._writer_depth += 1
+            return
+        if getattr(self._local, 'read_depth', 0):
+            raise RuntimeError('A lock held for reading cannot be upgraded to a write lock')
+
+        with self._condition:
+            self._writers_waiting += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._condition.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = me
+            self._writer_depth = 1
+
+    def release_write(self):
+        if self._writer != threading.get_ident():
+            raise RuntimeError('Cannot release a write lock the thread does not hold')
+
+        self._writer_depth -= 1
+        if self._writer_depth:
+            return
+
+        with self._condition:
+            self._writer = None
+            if getattr(self._local, 'read_depth', 0):
+                # Still reading, so hold the lock as a reader rather than letting a writer in.
+                self._readers += 1
+                self._local.counted = True
+            self._condition.notify_all()
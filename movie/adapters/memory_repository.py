@@ -3,19 +3,28 @@ import os
 from datetime import date, datetime
 from typing import List
 
-from bisect import bisect, bisect_left, insort_left
+from bisect import bisect, bisect_left, insort, insort_left
+from contextlib import nullcontext
 
 from werkzeug.security import generate_password_hash
 
 from movie.adapters.repository import AbstractRepository, RepositoryException
+from movie.adapters.locking import ReadWriteLock
 from movie.domain.model import User
 from movie.domain.model import Movie, Genre, Actor, Director, Review
 from movie.domain.model import make_genre_association, make_actor_association, make_director_association, make_review
 
 
 class MemoryRepository(AbstractRepository):
+    """ Holds the catalog, users and comments in memory.
 
-    def __init__(self):
+    When thread_safe, methods that add to the repository hold a write lock and methods that walk its lists hold a read
+    lock, so any number of threads can read at once while writers see, and leave, the repository consistent. Lists of
+    Genres, Actors, Directors and Comments are returned as copies. Looking up a Movie by id is a single dict lookup,
+    which needs no lock. Without thread_safe, e.g. for single threaded workers, the locks are skipped.
+    """
+
+    def __init__(self, thread_safe: bool = True):
         # self._articles = list()
         # self._articles_index = dict()
         self._tags = list()
@@ -29,15 +38,44 @@ class MemoryRepository(AbstractRepository):
         self._directors = list()
         self._reviews = list()
 
+        # Each Movie's Comments, ordered by timestamp and then by when they were added.
+        self._reviews_by_movie_id = dict()
+        self._number_of_reviews_added = 0
+
+        # The first Genre, Actor and Director added under each name.
+        self._genres_index = dict()
+        self._actors_index = dict()
+        self._directors_index = dict()
+
+        self._catalog_version = 0
+
+        # Sorted movie id tuples, keyed by (facet, name), with the catalog version and movie count they were built for.
+        self._movie_id_indexes = dict()
+
+        self._lock = ReadWriteLock() if thread_safe else None
+
+    def reading(self):
+        return self._lock.reading() if self._lock is not None else nullcontext()
+
+    def writing(self):
+        return self._lock.writing() if self._lock is not None else nullcontext()
+
     def add_user(self, user: User):
-        self._users.append(user)
+        with self.writing():
+            self._users.append(user)
 
     def get_user(self, username) -> User:
-        return next((user for user in self._users if user.username == username), None)
+        with self.reading():
+            return next((user for user in self._users if user.username == username), None)
+
+    def get_number_of_users(self) -> int:
+        return len(self._users)
 
     def add_movie(self, movie: Movie):
-        insort_left(self._movies, movie)
-        self._movies_index[movie.id] = movie
+        with self.writing():
+            insort_left(self._movies, movie)
+            self._movies_index[movie.id] = movie
+            self._catalog_version += 1
 
     def get_movie(self, id: int) -> Movie:
         movie = None
@@ -53,25 +91,37 @@ class MemoryRepository(AbstractRepository):
         return len(self._movies)
 
     def get_movies_by_id(self, id_list):
-        # Strip out any ids in id_list that don't represent Movie ids in the repository.
-        existing_ids = [id for id in id_list if id in self._movies_index]
-
-        # Fetch the Movies.
-        movies = [self._movies_index[id] for id in existing_ids]
+        # Fetch the Movies in a single pass, skipping ids that don't represent Movies in the repository.
+        movies = [movie for movie in map(self._movies_index.get, id_list) if movie is not None]
         return movies
 
+    def get_movies_and_missing_ids(self, id_list):
+        movies = list()
+        missing_ids = list()
+
+        for id in id_list:
+            movie = self._movies_index.get(id)
+            if movie is None:
+                missing_ids.append(id)
+            else:
+                movies.append(movie)
+
+        return movies, missing_ids
+
     def get_movie_ids_all(self):
-        movie_ids = [movie.id for movie in self._movies]
+        with self.reading():
+            movie_ids = [movie.id for movie in self._movies]
 
         return movie_ids
 
     def get_movie_ids_for_genre(self, genre_name: str):
-        # Linear search, to find the first occurrence of a Genre with the name genre_name.
-        genre = next((genre for genre in self._genres if genre.genre_name == genre_name), None)
+        # Find the first Genre added with the name genre_name.
+        genre = self._genres_index.get(genre_name)
 
         # Retrieve the ids of movies associated with the Genre.
         if genre is not None:
-            movie_ids = [movie.id for movie in genre.genre_movies]
+            with self.reading():
+                movie_ids = [movie.id for movie in genre.genre_movies]
         else:
             # No Genre with name genre_name, so return an empty list.
             movie_ids = list()
@@ -79,12 +129,13 @@ class MemoryRepository(AbstractRepository):
         return movie_ids
 
     def get_movie_ids_for_actor(self, actor_name: str):
-        # Linear search, to find the first occurrence of a Actor with the name actor_name.
-        actor = next((actor for actor in self._actors if actor.actor_name == actor_name), None)
+        # Find the first Actor added with the name actor_name.
+        actor = self._actors_index.get(actor_name)
 
         # Retrieve the ids of movies associated with the Actor.
         if actor is not None:
-            movie_ids = [movie.id for movie in actor.actor_movies]
+            with self.reading():
+                movie_ids = [movie.id for movie in actor.actor_movies]
         else:
             # No Actor with name actor_name, so return an empty list.
             movie_ids = list()
@@ -92,42 +143,124 @@ class MemoryRepository(AbstractRepository):
         return movie_ids
 
     def get_movie_ids_for_director(self, director_name: str):
-        # Linear search, to find the first occurrence of a Director with the name director_name .
-        director = next((director for director in self._directors if director.director_name == director_name), None)
+        # Find the first Director added with the name director_name.
+        director = self._directors_index.get(director_name)
 
         # Retrieve the ids of movies associated with the Director.
         if director is not None:
-            movie_ids = [movie.id for movie in director.director_movies]
+            with self.reading():
+                movie_ids = [movie.id for movie in director.director_movies]
         else:
             # No Director with name director_name , so return an empty list.
             movie_ids = list()
 
         return movie_ids
 
+    def get_movie_id_index(self, facet: str = None, name: str = None):
+        if facet is None:
+            number_of_movies, movies = len(self._movies), self._movies
+        else:
+            entity = self._facet_index(facet).get(name)
+            if entity is None:
+                return ()
+            number_of_movies, movies = FACET_MOVIES[facet](entity)
+
+        # Associations can be made after an entity is added, so an index is also rebuilt if its movie count changes.
+        key = (facet, name)
+        entry = self._movie_id_indexes.get(key)
+        if entry is None or entry[0] != self._catalog_version or entry[1] != number_of_movies:
+            # Readers racing to build the same index build equal entries, and storing one is a single dict assignment.
+            with self.reading():
+                entry = (self._catalog_version, number_of_movies, tuple(sorted(movie.id for movie in movies)))
+            self._movie_id_indexes[key] = entry
+
+        return entry[2]
+
+    def build_movie_id_indexes(self) -> int:
+        """ Builds the movie id index of the whole catalog and of every Genre, Actor and Director up front.
+
+        Returns the number of indexes built.
+        """
+        self.get_movie_id_index()
+        for facet in FACET_MOVIES:
+            for name in self._facet_index(facet):
+                self.get_movie_id_index(facet, name)
+        return len(self._movie_id_indexes)
+
+    def _facet_index(self, facet: str):
+        if facet == 'genre':
+            return self._genres_index
+        if facet == 'actor':
+            return self._actors_index
+        return self._directors_index
+
     def add_genre(self, genre: Genre):
-        self._genres.append(genre)
+        with self.writing():
+            self._genres.append(genre)
+            self._genres_index.setdefault(genre.genre_name, genre)
+            self._catalog_version += 1
 
     def get_genres(self) -> List[Genre]:
-        return self._genres
+        with self.reading():
+            return list(self._genres)
 
     def add_actor(self, actor: Actor):
-        self._actors.append(actor)
+        with self.writing():
+            self._actors.append(actor)
+            self._actors_index.setdefault(actor.actor_name, actor)
+            self._catalog_version += 1
 
     def get_actors(self) -> List[Actor]:
-        return self._actors
+        with self.reading():
+            return list(self._actors)
 
     def add_director(self, director: Director):
-        self._directors.append(director)
+        with self.writing():
+            self._directors.append(director)
+            self._directors_index.setdefault(director.director_name, director)
+            self._catalog_version += 1
 
     def get_directors(self) -> List[Director]:
-        return self._directors
+        with self.reading():
+            return list(self._directors)
 
     def add_review(self, comment: Review):
         super().add_review(comment)
-        self._reviews.append(comment)
+        with self.writing():
+            self._reviews.append(comment)
+
+            self._number_of_reviews_added += 1
+            movie_reviews = self._reviews_by_movie_id.setdefault(comment.movie.id, list())
+            insort(movie_reviews, (review_sort_key(comment), self._number_of_reviews_added, comment))
+
+    def get_number_of_reviews(self) -> int:
+        return len(self._reviews)
+
+    def get_reviews_for_movie(self, movie_id: int, start: int = 0, limit: int = None) -> List[Review]:
+        end = None if limit is None else start + limit
+        with self.reading():
+            movie_reviews = self._reviews_by_movie_id.get(movie_id, ())[start:end]
+        return [comment for sort_key, sequence, comment in movie_reviews]
 
     def get_reviews(self):
-        return self._reviews
+        with self.reading():
+            return list(self._reviews)
+
+    def get_catalog_version(self) -> int:
+        return self._catalog_version
+
+
+def review_sort_key(comment: Review):
+    # Comments without a timestamp sort first.
+    return comment.timestamp if comment.timestamp is not None else datetime.min
+
+
+# For each facet, returns the number of Movies associated with an entity and an iterator over them.
+FACET_MOVIES = {
+    'genre': lambda genre: (genre.number_of_genre_movies, genre.genre_movies),
+    'actor': lambda actor: (actor.number_of_actor_movies, actor.actor_movies),
+    'director': lambda director: (director.number_of_director_movies, director.director_movies)
+}
 
 
 def read_csv_file(filename: str):
@@ -239,12 +372,20 @@ def load_movies_and_genres(data_path: str, repo: MemoryRepository):
         repo.add_director(director)
 
 
-def populate(data_path: str, repo: MemoryRepository):
+def populate(data_path: str, repo: MemoryRepository, on_phase=None):
+    # on_phase, if given, is called with the name of each loading phase as it starts.
+    def start_phase(phase: str):
+        if on_phase is not None:
+            on_phase(phase)
+
     # Load movies and genres into the repository.
+    start_phase('movies')
     load_movies_and_genres(data_path, repo)
 
     # Load users into the repository.
+    start_phase('users')
     users = load_users(data_path, repo)
 
     # Load comments into the repository.
+    start_phase('comments')
     load_comments(data_path, repo, users)
@@ -1,5 +1,6 @@
 import abc
-from typing import List
+from contextlib import nullcontext
+from typing import List, Sequence
 
 from movie.domain.model import User
 from movie.domain.model import Movie, Genre, Actor, Director, Review
@@ -16,6 +17,19 @@ class RepositoryException(Exception):
 
 class AbstractRepository(abc.ABC):
 
+    def reading(self):
+        """ Returns a context manager that keeps the repository from being written while it's held.
+
+        Repositories that can be shared by threads override this method; by default it does nothing.
+        """
+        return nullcontext()
+
+    def writing(self):
+        """ Returns a context manager that gives the holder sole access to the repository, e.g. to make an update
+        spanning several calls. It can be held again by the same thread.
+        """
+        return nullcontext()
+
     @abc.abstractmethod
     def add_user(self, user: User):
         """" Adds a User to the repository. """
@@ -29,6 +43,11 @@ class AbstractRepository(abc.ABC):
         """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def get_number_of_users(self) -> int:
+        """ Returns the number of Users in the repository. """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def add_movie(self, movie: Movie):
         """ Adds an Movie to the repository. """
@@ -55,6 +74,13 @@ class AbstractRepository(abc.ABC):
         """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def get_movies_and_missing_ids(self, id_list):
+        """ Returns a list of the Movies whose ids are in id_list, in id_list order, and a list of the ids in id_list
+        that don't match a Movie in the repository.
+        """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def get_movie_ids_all(self):
         """ Returns a list of ids representing all Movies.
@@ -87,6 +113,16 @@ class AbstractRepository(abc.ABC):
         """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def get_movie_id_index(self, facet: str = None, name: str = None) -> Sequence[int]:
+        """ Returns the ids of Movies associated with the 'genre', 'actor' or 'director' called name, in ascending
+        order. If facet is None, the ids of all Movies are returned.
+
+        The returned sequence may be shared between callers and must not be modified. If there is no such genre,
+        actor or director, this method returns an empty sequence.
+        """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def add_genre(self, genre: Genre):
         """ Adds a Genre to the repository. """
@@ -124,9 +160,9 @@ class AbstractRepository(abc.ABC):
         If the Comment doesn't have bidirectional links with an Movie and a User, this method raises a
         RepositoryException and doesn't update the repository.
         """
-        if comment.user is None or comment not in comment.user.reviews:
+        if comment.user is None or not comment.user.has_review(comment):
             raise RepositoryException('Comment not correctly attached to a User')
-        if comment.movie is None or comment not in comment.movie.comments:
+        if comment.movie is None or not comment.movie.has_comment(comment):
             raise RepositoryException('Comment not correctly attached to an Movie')
 
     @abc.abstractmethod
@@ -134,9 +170,25 @@ class AbstractRepository(abc.ABC):
         """ Returns the Comments stored in the repository. """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def get_number_of_reviews(self) -> int:
+        """ Returns the number of Comments in the repository. """
+        raise NotImplementedError
 
+    @abc.abstractmethod
+    def get_reviews_for_movie(self, movie_id: int, start: int = 0, limit: int = None) -> List[Review]:
+        """ Returns up to limit of the Comments for the Movie with movie_id, ordered by timestamp, starting from the
+        start-th Comment. If limit is None, all Comments from start are returned.
 
+        If there is no Movie with the given id, or it has no Comments, this method returns an empty list.
+        """
+        raise NotImplementedError
 
+    @abc.abstractmethod
+    def get_catalog_version(self) -> int:
+        """ Returns a number that changes whenever Movies, Genres, Actors or Directors are added.
 
-
+        Comments don't change the catalog version.
+        """
+        raise NotImplementedError
 
@@ -0,0 +1,77 @@
+from flask import Blueprint, request, jsonify, current_app
+
+import movie.adapters.repository as repo
+import movie.api.services as services
+
+
+# Configure Blueprint.
+api_blueprint = Blueprint(
+    'api_bp', __name__, url_prefix='/api')
+
+
+@api_blueprint.route('/movies', methods=['GET'])
+def movies():
+    try:
+        return jsonify(services.search_movies(
+            request.args, current_app.config['API_PAGE_SIZE'], current_app.config['API_MAX_PAGE_SIZE'],
+            repo.repo_instance
+        ))
+    except services.UnknownFieldException as e:
+        return error_response(400, f'Unknown fields: {e}')
+    except ValueError:
+        return error_response(400, 'limit must be an integer')
+
+
+@api_blueprint.route('/movies:batchGet', methods=['POST'])
+def batch_get_movies():
+    # The request body is a JSON object with a list of movie ids, and optionally fields as for GET /api/movies.
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return error_response(400, 'The request body must be a JSON object')
+
+    fields = body.get('fields')
+    if isinstance(fields, list) and all(isinstance(field, str) for field in fields):
+        fields = ','.join(fields)
+    elif fields is not None and not isinstance(fields, str):
+        return error_response(400, 'fields must be a string or a list of strings')
+
+    try:
+        movies_as_dict, missing_ids = services.batch_get_movies(
+            body.get('ids'), services.parse_fields(fields), current_app.config['API_MAX_BATCH_SIZE'],
+            repo.repo_instance
+        )
+    except services.UnknownFieldException as e:
+        return error_response(400, f'Unknown fields: {e}')
+    except services.InvalidBatchException as e:
+        return error_response(400, str(e))
+
+    return jsonify(movies=movies_as_dict, missing_ids=missing_ids)
+
+
+@api_blueprint.route('/movies/<int:movie_id>', methods=['GET'])
+def movie(movie_id):
+    try:
+        fields = services.parse_fields(request.args.get('fields'))
+        return jsonify(services.get_movie(movie_id, fields, repo.repo_instance))
+    except services.UnknownFieldException as e:
+        return error_response(400, f'Unknown fields: {e}')
+    except services.NonExistentMovieException:
+        return error_response(404, f'Movie {movie_id} does not exist')
+
+
+@api_blueprint.route('/movies/<int:movie_id>/comments', methods=['GET'])
+def movie_comments(movie_id):
+    start = request.args.get('start', 0, type=int)
+    limit = request.args.get('limit', current_app.config['COMMENTS_PER_PAGE'], type=int)
+    limit = min(max(limit, 1), current_app.config['API_MAX_PAGE_SIZE'])
+
+    try:
+        return jsonify(services.get_comments_page(movie_id, start, limit, repo.repo_instance))
+    except services.NonExistentMovieException:
+        return error_response(404, f'Movie {movie_id} does not exist')
+
+
+def error_response(status: int, message: str):
+    response = jsonify(error=message)
+    response.status_code = status
+    return response
@@ -0,0 +1,136 @@
+from typing import Iterable
+
+from movie.adapters.repository import AbstractRepository
+from movie.domain.model import Movie, Review
+import movie.movies.services as movies_services
+from movie.movies.services import NonExistentMovieException
+
+
+class UnknownFieldException(Exception):
+    pass
+
+
+class InvalidBatchException(Exception):
+    pass
+
+
+# Each field a client can ask for, with how to read it from a Movie. Related entities are emitted by name only.
+MOVIE_FIELDS = {
+    'id': lambda movie: movie.id,
+    'title': lambda movie: movie.title,
+    'description': lambda movie: movie.description,
+    'year': lambda movie: movie.year,
+    'runtime_minutes': lambda movie: movie.runtime_minutes,
+    'rating': lambda movie: movie.rating,
+    'votes': lambda movie: movie.votes,
+    'revenue_millions': lambda movie: movie.revenue_millions,
+    'meta_score': lambda movie: movie.meta_score,
+    'genres': lambda movie: [genre.genre_name for genre in movie.genres],
+    'actors': lambda movie: [actor.actor_name for actor in movie.actors],
+    'directors': lambda movie: [director.director_name for director in movie.directors],
+    'number_of_comments': lambda movie: movie.number_of_comments,
+    'comments': lambda movie: comments_to_flat_dict(movie.comments)
+}
+
+# Comments can be numerous, so they're only serialized when asked for.
+DEFAULT_MOVIE_FIELDS = tuple(field for field in MOVIE_FIELDS if field != 'comments')
+
+
+def parse_fields(fields: str):
+    """ Returns the field names listed in the comma separated string fields, or the default fields if it's empty. """
+    if not fields:
+        return DEFAULT_MOVIE_FIELDS
+
+    field_names = tuple(field.strip() for field in fields.split(',') if field.strip())
+    unknown_fields = [field for field in field_names if field not in MOVIE_FIELDS]
+    if unknown_fields:
+        raise UnknownFieldException(', '.join(unknown_fields))
+
+    return field_names or DEFAULT_MOVIE_FIELDS
+
+
+def search_movies(args, default_limit: int, max_limit: int, repo: AbstractRepository):
+    """ Returns a page of search results, as a dict ready to be sent as JSON, for the query parameters in args.
+
+    args maps the parameter names genre, actor, director, cursor, fields and limit to strings; all are optional.
+    Raises UnknownFieldException if fields names an unknown field, and ValueError if limit isn't an integer.
+    """
+    genre_name = args.get('genre', '').strip()
+    actor_name = args.get('actor', '').strip()
+    director_name = args.get('director', '').strip()
+    # pagination cursor, an opaque keyset cursor taken from a previous response
+    cursor = args.get('cursor')
+
+    fields = parse_fields(args.get('fields'))
+    limit = min(max(int(args.get('limit', default_limit)), 1), max_limit)
+
+    page = movies_services.get_movie_ids_page(genre_name, actor_name, director_name, repo,
+                                              cursor=cursor, per_page=limit)
+
+    return {
+        'movies': get_movies_by_id(page.movie_ids, fields, repo),
+        'total': movies_services.get_number_of_search_results(genre_name, actor_name, director_name, repo),
+        'next_cursor': movies_services.encode_cursor('after', page.movie_ids[-1]) if page.has_next else None,
+        'previous_cursor': movies_services.encode_cursor('before', page.movie_ids[0]) if page.has_previous else None
+    }
+
+
+def batch_get_movies(id_list, fields, max_batch_size: int, repo: AbstractRepository):
+    """ Returns the Movies with ids in id_list, in the same order, as flat dicts, and the ids that matched no Movie.
+
+    Raises InvalidBatchException if id_list isn't a list of at most max_batch_size integers.
+    """
+    if not isinstance(id_list, list) or not all(type(movie_id) is int for movie_id in id_list):
+        raise InvalidBatchException('ids must be a list of integers')
+    if len(id_list) > max_batch_size:
+        raise InvalidBatchException(f'At most {max_batch_size} ids can be requested at once')
+
+    movies, missing_ids = repo.get_movies_and_missing_ids(id_list)
+
+    # Movies requested more than once are serialized once and share their dict.
+    movies_as_dict = dict()
+    for movie in movies:
+        if movie.id not in movies_as_dict:
+            movies_as_dict[movie.id] = movie_to_flat_dict(movie, fields)
+
+    return [movies_as_dict[movie.id] for movie in movies], missing_ids
+
+
+def get_comments_page(movie_id: int, start: int, limit: int, repo: AbstractRepository):
+    return movies_services.get_comments_page(movie_id, start, limit, repo, serialize=comments_to_flat_dict)
+
+
+def get_movie(movie_id: int, fields, repo: AbstractRepository):
+    movie = repo.get_movie(movie_id)
+
+    if movie is None:
+        raise NonExistentMovieException
+
+    return movie_to_flat_dict(movie, fields)
+
+
+def get_movies_by_id(id_list, fields, repo: AbstractRepository):
+    movies = repo.get_movies_by_id(id_list)
+
+    return [movie_to_flat_dict(movie, fields) for movie in movies]
+
+
+# ==================================================
+# Functions to convert model entities to flat dicts
+# ==================================================
+
+def movie_to_flat_dict(movie: Movie, fields=DEFAULT_MOVIE_FIELDS):
+    return {field: MOVIE_FIELDS[field](movie) for field in fields}
+
+
+def comment_to_flat_dict(comment: Review):
+    comment_dict = {
+        'username': comment.user.username,
+        'comment_text': comment.comment,
+        'timestamp': comment.timestamp.isoformat() if comment.timestamp is not None else None
+    }
+    return comment_dict
+
+
+def comments_to_flat_dict(comments: Iterable[Review]):
+    return [comment_to_flat_dict(comment) for comment in comments]
@@ -0,0 +1,183 @@
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import request
+
+from movie import create_app
+
+
+# Set in a request's WSGI environ when its response is streamed.
+STREAMED_ENVIRON_KEY = 'movie.asgi.streamed'
+
+
+class AsgiApp:
+    """ Serves the movie application to an ASGI server, e.g. uvicorn, from a single asyncio event loop.
+
+    Every request is handed to the Flask application on a bounded pool of worker threads, so it goes through the
+    same hooks, e.g. the catalog readiness check, rate limiting, metrics and compression, as under a WSGI server.
+    Request bodies are read on the event loop, and responses are built on a worker thread and sent from the event
+    loop, so a client slow to send or read doesn't hold a worker thread. The exception is a response streamed with
+    stream_with_context, e.g. /movies_by_genre/export: Flask keeps its contexts per thread, so it's produced on one
+    worker thread, which waits while each chunk is sent. CPU-heavy work done by views, such as check_password_hash
+    when logging in and the profanity check on comments, always runs on a worker thread rather than blocking the
+    event loop.
+    """
+
+    def __init__(self, flask_app, max_workers: int = 8):
+        self.flask_app = flask_app
+        # Registered last, so it's the first after_request hook to see the view's response.
+        flask_app.after_request(mark_streamed)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='asgi-worker')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(f'Unsupported ASGI scope type: {scope["type"]}')
+
+        await self._call_wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self._executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _call_wsgi(self, scope, receive, send):
+        loop = asyncio.get_running_loop()
+
+        body = await read_body(receive)
+        environ = wsgi_environ(scope, body)
+
+        # Flask keeps its request and app contexts per thread, so the view runs, and its whole response is produced
+        # and closed, on one worker thread.
+        response = await loop.run_in_executor(self._executor, self._run_wsgi, environ, loop, send)
+        if response is None:
+            # A streamed response, already sent by the worker.
+            return
+
+        status, headers, body = response
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    def _run_wsgi(self, environ, loop, send):
+        """ Runs the Flask app for environ on the current worker thread.
+
+        Returns the status, headers and body of an ordinary response for the event loop to send, so the worker is
+        free again before the client reads it. A response streamed with stream_with_context can only be produced on
+        the thread that began it, so the worker sends that one itself, chunk by chunk, and returns None.
+        """
+        response_start = dict()
+
+        def start_response(status, headers, exc_info=None):
+            response_start['status'] = int(status.split(' ', 1)[0])
+            response_start['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers
+            ]
+            return response_start.setdefault('written', list()).append
+
+        iterable = self.flask_app.wsgi_app(environ, start_response)
+        try:
+            if not environ.get(STREAMED_ENVIRON_KEY):
+                body = b''.join(iterable)
+                written = b''.join(response_start.get('written', ()))
+                return response_start['status'], response_start['headers'], written + body
+
+            self._send_streamed(iterable, response_start, loop, send)
+            return None
+        finally:
+            if hasattr(iterable, 'close'):
+                iterable.close()
+
+    @staticmethod
+    def _send_streamed(iterable, response_start, loop, send):
+        def send_message(message):
+            # Waiting for each message to be sent holds the response back while the client is slow to read it. If
+            # the client has gone, the exception stops the response.
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        chunks = iter(iterable)
+        chunk = next(chunks, None)
+
+        send_message({
+            'type': 'http.response.start',
+            'status': response_start['status'],
+            'headers': response_start['headers']
+        })
+        for written in response_start.get('written', ()):
+            send_message({'type': 'http.response.body', 'body': written, 'more_body': True})
+
+        while chunk is not None:
+            send_message({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            chunk = next(chunks, None)
+
+        send_message({'type': 'http.response.body', 'body': b''})
+
+
+def mark_streamed(response):
+    # Tells AsgiApp whether the response has to be produced on its worker thread as it's sent.
+    request.environ[STREAMED_ENVIRON_KEY] = response.is_streamed
+    return response
+
+
+async def read_body(receive) -> bytes:
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        body.extend(message.get('body', b''))
+        if not message.get('more_body', False):
+            break
+    return bytes(body)
+
+
+def wsgi_environ(scope, body: bytes) -> dict:
+    """ Returns a PEP 3333 environ for the ASGI HTTP scope and request body. """
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False
+    }
+
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            key = name
+        else:
+            key = f'HTTP_{name}'
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+
+    # The body has already been read in full, e.g. from a chunked request, so its length is known.
+    environ.setdefault('CONTENT_LENGTH', str(len(body)))
+
+    return environ
+
+
+def create_asgi_app(test_config=None):
+    flask_app = create_app(test_config)
+    return AsgiApp(flask_app, max_workers=flask_app.config['ASGI_WORKER_THREADS'])
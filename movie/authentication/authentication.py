@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, redirect, url_for, session, request
+from flask import Blueprint, render_template, redirect, url_for, session, request, current_app
 
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField
@@ -26,7 +26,8 @@ def register():
         # Successful POST, i.e. the username and password have passed validation checking.
         # Use the service layer to attempt to add the new user.
         try:
-            services.add_user(form.username.data, form.password.data, repo.repo_instance)
+            services.add_user(form.username.data, form.password.data, repo.repo_instance,
+                              current_app.extensions['kdf_pool'])
 
             # All is well, redirect the user to the login page.
             return redirect(url_for('authentication_bp.login'))
@@ -41,9 +42,9 @@ def register():
         username_error_message=username_not_unique,
         handler_url=url_for('authentication_bp.register'),
 
-        genre_urls=utilities.get_genres_and_urls(),
-        actor_urls=utilities.get_actors_and_urls(),
-        director_urls=utilities.get_directors_and_urls(),
+        genre_names=utilities.get_genre_names,
+        actor_names=utilities.get_actor_names,
+        director_names=utilities.get_director_names,
 
     )
 
@@ -61,7 +62,8 @@ def login():
             user = services.get_user(form.username.data, repo.repo_instance)
 
             # Authenticate user.
-            services.authenticate_user(user['username'], form.password.data, repo.repo_instance)
+            services.authenticate_user(user['username'], form.password.data, repo.repo_instance,
+                                       current_app.extensions['kdf_pool'])
 
             # Initialise session and redirect the user to the home page.
             session.clear()
@@ -84,9 +86,9 @@ def login():
         password_error_message=password_does_not_match_username,
         form=form,
 
-        genre_urls=utilities.get_genres_and_urls(),
-        actor_urls=utilities.get_actors_and_urls(),
-        director_urls=utilities.get_directors_and_urls(),
+        genre_names=utilities.get_genre_names,
+        actor_names=utilities.get_actor_names,
+        director_names=utilities.get_director_names,
 
     )
 
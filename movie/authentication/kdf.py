@@ -0,0 +1,93 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class KdfPoolBusyException(Exception):
+    pass
+
+
+class KdfPool:
+    """ Hashes and checks passwords on a small, dedicated pool of threads.
+
+    Password hashing is deliberately slow. Doing it on request threads lets a burst of logins or registrations take
+    every thread, and the CPU, away from catalog pages. The pool caps how many hashes run at once, and at most
+    max_queue more can wait; beyond that, KdfPoolBusyException is raised straight away rather than queueing the
+    request, and the app answers 503. Werkzeug hashes with hashlib.pbkdf2_hmac, which releases the GIL, so the
+    workers run in parallel with each other and with request threads.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 16, method: str = 'pbkdf2:sha256'):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.method = method
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='kdf-worker')
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def hash_password(self, password: str) -> str:
+        return self._run(generate_password_hash, password, self.method)
+
+    def check_password(self, password_hash: str, password: str) -> bool:
+        return self._run(check_password_hash, password_hash, password)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'in_flight': self._in_flight,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'wait_seconds_total': self.wait_seconds_total,
+                'wait_seconds_max': self.wait_seconds_max,
+                'wait_seconds_mean': self.wait_seconds_total / self.completed if self.completed else 0.0
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def _run(self, function, *args):
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise KdfPoolBusyException
+            self._in_flight += 1
+
+        submitted = time.monotonic()
+        try:
+            return self._executor.submit(self._timed, submitted, function, *args).result()
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _timed(self, submitted: float, function, *args):
+        waited = time.monotonic() - submitted
+        try:
+            return function(*args)
+        finally:
+            with self._lock:
+                self.completed += 1
+                self.wait_seconds_total += waited
+                self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+
+def kdf_pool_busy(e):
+    message = 'Too many logins and registrations are in progress, please try again shortly.'
+    response = current_app.response_class(message, status=503, mimetype='text/plain')
+    response.headers['Retry-After'] = str(current_app.config['KDF_RETRY_AFTER'])
+    return response
+
+
+def init_kdf_pool(app):
+    app.extensions['kdf_pool'] = KdfPool(
+        app.config['KDF_WORKERS'], app.config['KDF_MAX_QUEUE'], app.config['PASSWORD_HASH_METHOD']
+    )
+    app.register_error_handler(KdfPoolBusyException, kdf_pool_busy)
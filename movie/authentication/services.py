@@ -1,6 +1,7 @@
 from werkzeug.security import generate_password_hash, check_password_hash
 
 from movie.adapters.repository import AbstractRepository
+from movie.authentication.kdf import KdfPool
 from movie.domain.model import User
 
 
@@ -16,18 +17,27 @@ class AuthenticationException(Exception):
     pass
 
 
-def add_user(username: str, password: str, repo: AbstractRepository):
+def add_user(username: str, password: str, repo: AbstractRepository, kdf: KdfPool = None):
     # Check that the given username is available.
     user = repo.get_user(username)
     if user is not None:
         raise NameNotUniqueException
 
-    # Encrypt password so that the database doesn't store passwords 'in the clear'.
-    password_hash = generate_password_hash(password)
+    # Encrypt password so that the database doesn't store passwords 'in the clear'. Given a KdfPool, the password is
+    # hashed on one of its threads.
+    if kdf is not None:
+        password_hash = kdf.hash_password(password)
+    else:
+        password_hash = generate_password_hash(password)
 
-    # Create and store the new User, with password encrypted.
-    user = User(username, password_hash)
-    repo.add_user(user)
+    # Create and store the new User, with password encrypted. The username is checked again while the repository is
+    # held, in case another request registered it while the password was being hashed.
+    with repo.writing():
+        if repo.get_user(username) is not None:
+            raise NameNotUniqueException
+
+        user = User(username, password_hash)
+        repo.add_user(user)
 
 
 def get_user(username: str, repo: AbstractRepository):
@@ -38,12 +48,15 @@ def get_user(username: str, repo: AbstractRepository):
     return user_to_dict(user)
 
 
-def authenticate_user(username: str, password: str, repo: AbstractRepository):
+def authenticate_user(username: str, password: str, repo: AbstractRepository, kdf: KdfPool = None):
     authenticated = False
 
     user = repo.get_user(username)
     if user is not None:
-        authenticated = check_password_hash(user.password, password)
+        if kdf is not None:
+            authenticated = kdf.check_password(user.password, password)
+        else:
+            authenticated = check_password_hash(user.password, password)
     if not authenticated:
         raise AuthenticationException
 
@@ -0,0 +1,69 @@
+import hashlib
+from datetime import datetime, timezone
+
+from flask import request, make_response
+
+from movie.compression.compression import GZIP_ETAG_SUFFIX
+
+
+# Pages can't have changed before this process loaded the catalog.
+_started_at = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def make_etag(*parts) -> str:
+    """ Returns a strong entity tag derived from parts, which must have stable reprs. """
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+
+def last_modified_from(timestamp: datetime = None) -> datetime:
+    """ Returns an aware, second-resolution Last-Modified value for a page whose newest content is timestamp.
+
+    Naive timestamps, as stored on Reviews, are interpreted as local time.
+    """
+    if timestamp is None:
+        return _started_at
+    return max(_started_at, timestamp.astimezone(timezone.utc).replace(microsecond=0))
+
+
+def not_modified(etag: str = None, last_modified: datetime = None):
+    """ Returns a 304 response if the current request's validators match, otherwise None.
+
+    A page with an entity tag is only matched by If-None-Match: the tag also changes with what the page's
+    Last-Modified time doesn't, e.g. the logged in user and the catalog version. If-Modified-Since is only used for
+    pages without one.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return None
+
+    if etag is not None:
+        matched = False
+        if request.if_none_match:
+            # Clients send back the tag of the encoding they received, which the 304 repeats.
+            if request.if_none_match.contains(etag + GZIP_ETAG_SUFFIX):
+                etag += GZIP_ETAG_SUFFIX
+            matched = request.if_none_match.contains(etag)
+    elif last_modified is not None and request.if_modified_since is not None:
+        if_modified_since = request.if_modified_since
+        if if_modified_since.tzinfo is None:
+            if_modified_since = if_modified_since.replace(tzinfo=timezone.utc)
+        matched = last_modified <= if_modified_since
+    else:
+        matched = False
+
+    if not matched:
+        return None
+
+    response = make_response('', 304)
+    return set_validators(response, etag, last_modified)
+
+
+def set_validators(response, etag: str = None, last_modified: datetime = None):
+    if etag is not None:
+        response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+
+    # Pages vary with the session, so only the client may store them, and it must revalidate on every use.
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
@@ -0,0 +1,49 @@
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from movie.caching.lru import LRUCache
+
+
+class FragmentCacheExtension(Extension):
+    """ Adds a {% cache key, ... %} ... {% endcache %} tag to Jinja.
+
+    The body of the tag is rendered once per distinct key and the resulting HTML is kept in the environment's
+    fragment_cache, a bounded LRUCache. On a cache hit the body, including any loops inside it, isn't evaluated.
+    """
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=LRUCache())
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+
+        # The key is every comma separated expression following the tag name.
+        key_parts = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            key_parts.append(parser.parse_expression())
+
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+
+        return nodes.CallBlock(
+            self.call_method('_render_cached', [nodes.List(key_parts)]), [], [], body
+        ).set_lineno(lineno)
+
+    def _render_cached(self, key_parts, caller):
+        cache = self.environment.fragment_cache
+        key = tuple(key_parts)
+
+        fragment = cache.get(key)
+        if fragment is None:
+            fragment = Markup(caller())
+            cache.set(key, fragment)
+
+        return fragment
+
+
+def init_fragment_cache(app):
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.fragment_cache = LRUCache(app.config['FRAGMENT_CACHE_SIZE'])
@@ -0,0 +1,71 @@
+from collections import OrderedDict
+from threading import Lock
+
+
+class LRUCache:
+    """ A bounded, thread-safe mapping that evicts the least recently used entry when full. """
+
+    def __init__(self, maxsize: int = 128, on_evict=None):
+        self._maxsize = maxsize
+        # Called with the key and value of each entry evicted to make room.
+        self._on_evict = on_evict
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def maxsize(self) -> int:
+        return self._maxsize
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        if self._maxsize <= 0:
+            return
+        evicted = list()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                evicted.append(self._entries.popitem(last=False))
+                self.evictions += 1
+
+        if self._on_evict is not None:
+            for evicted_key, evicted_value in evicted:
+                self._on_evict(evicted_key, evicted_value)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._entries.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'maxsize': self._maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
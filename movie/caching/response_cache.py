@@ -0,0 +1,167 @@
+import time
+from threading import Lock
+
+from flask import current_app, g, has_app_context, request, session
+
+import movie.adapters.repository as repo
+import movie.movies.services as movies_services
+from movie.caching.lru import LRUCache
+from movie.compression.compression import accepts_gzip
+
+
+class CachedResponse:
+    def __init__(self, data: bytes, status: int, headers, expires: float, movie_ids):
+        self.data = data
+        self.status = status
+        self.headers = headers
+        self.expires = expires
+        self.movie_ids = movie_ids
+
+
+class ResponseCache:
+    """ Caches whole GET responses for selected endpoints in a bounded LRU.
+
+    Entries vary with the endpoint, the query string, the logged in user, the catalog version and whether the client
+    accepts gzip, as pages are stored compressed for clients that do. They expire after the endpoint's time-to-live.
+    Views report the movies shown on a page with tag_movies(); adding a comment to one of those movies evicts the
+    page straight away.
+    """
+
+    def __init__(self, maxsize: int = 512, ttls: dict = None):
+        self._entries = LRUCache(maxsize, on_evict=self._forget)
+        self._ttls = dict(ttls or {})
+
+        # Maps movie ids to the keys of cached pages showing them.
+        self._keys_by_movie_id = dict()
+        self._lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def init_app(self, app):
+        app.extensions['response_cache'] = self
+        app.before_request(self._serve_cached)
+        app.after_request(self._store)
+
+        if invalidate_movie not in movies_services.comment_added_listeners:
+            movies_services.comment_added_listeners.append(invalidate_movie)
+
+    def invalidate_movie(self, movie_id: int):
+        with self._lock:
+            keys = self._keys_by_movie_id.pop(movie_id, set())
+        for key in keys:
+            entry = self._entries.pop(key)
+            if entry is not None:
+                self.invalidations += 1
+                self._forget(key, entry)
+
+    def clear(self):
+        self._entries.clear()
+        with self._lock:
+            self._keys_by_movie_id.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+            'evictions': self._entries.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+    def _key(self):
+        return (
+            request.endpoint,
+            tuple(sorted(request.args.items(multi=True))),
+            session.get('username'),
+            repo.repo_instance.get_catalog_version(),
+            accepts_gzip()
+        )
+
+    def _serve_cached(self):
+        if request.method != 'GET' or request.endpoint not in self._ttls:
+            return None
+
+        key = self._key()
+        g.response_cache_key = key
+
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires <= time.monotonic():
+            self._entries.pop(key)
+            self._forget(key, entry)
+            self.expirations += 1
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        g.response_cache_hit = True
+        response = current_app.response_class(entry.data, status=entry.status, headers=entry.headers)
+        response.headers['X-Cache'] = 'HIT'
+        # As in not_modified, a page with an entity tag is only matched by If-None-Match, not If-Modified-Since.
+        if response.get_etag()[0] is not None and not request.if_none_match:
+            return response
+        return response.make_conditional(request)
+
+    def _store(self, response):
+        key = g.get('response_cache_key')
+        if key is None or g.get('response_cache_hit'):
+            return response
+
+        response.headers['X-Cache'] = 'MISS'
+        response.vary.add('Cookie')
+
+        # Only complete, successful pages that don't change the session can be replayed to other requests.
+        if response.status_code != 200 or response.is_streamed or session.modified or 'Set-Cookie' in response.headers:
+            return response
+
+        movie_ids = tuple(g.get('response_cache_movie_ids', ()))
+        entry = CachedResponse(
+            data=response.get_data(),
+            status=response.status_code,
+            headers=[(name, value) for name, value in response.headers if name != 'X-Cache'],
+            expires=time.monotonic() + self._ttls[request.endpoint],
+            movie_ids=movie_ids
+        )
+        self._entries.set(key, entry)
+        with self._lock:
+            for movie_id in movie_ids:
+                self._keys_by_movie_id.setdefault(movie_id, set()).add(key)
+
+        return response
+
+    def _forget(self, key, entry):
+        with self._lock:
+            for movie_id in entry.movie_ids:
+                keys = self._keys_by_movie_id.get(movie_id)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._keys_by_movie_id[movie_id]
+
+
+def tag_movies(movie_ids):
+    """ Records that the response to the current request shows the Movies with the given ids. """
+    g.response_cache_movie_ids = list(movie_ids)
+
+
+def invalidate_movie(movie_id: int):
+    # Comments can be added outside a request, e.g. by the service layer tests, where there's no cache to update.
+    if not has_app_context():
+        return
+    cache = current_app.extensions.get('response_cache')
+    if cache is not None:
+        cache.invalidate_movie(movie_id)
+
+
+def init_response_cache(app):
+    if not app.config['RESPONSE_CACHE_ENABLED']:
+        return
+    ResponseCache(app.config['RESPONSE_CACHE_SIZE'], app.config['RESPONSE_CACHE_TTL']).init_app(app)
@@ -0,0 +1,44 @@
+import os
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from jinja2 import FileSystemBytecodeCache
+
+
+def precompile_templates(jinja_env):
+    """ Compiles every template the environment can load, so that they're in its template and bytecode caches.
+
+    Returns the names of the templates compiled.
+    """
+    template_names = jinja_env.list_templates()
+    for template_name in template_names:
+        jinja_env.get_template(template_name)
+    return template_names
+
+
+@click.command('precompile-templates')
+@with_appcontext
+def precompile_templates_command():
+    """ Build step: compile the templates into the bytecode cache directory. """
+    if current_app.jinja_env.bytecode_cache is None:
+        raise click.ClickException('Set TEMPLATE_BYTECODE_CACHE_DIR to precompile templates.')
+
+    for template_name in precompile_templates(current_app.jinja_env):
+        click.echo(f'Compiled {template_name}')
+
+
+def init_template_cache(app):
+    # Compiled templates are shared by every worker through the file system. Jinja checks each cached entry against
+    # its template's source, so a stale entry is simply recompiled.
+    cache_dir = app.config['TEMPLATE_BYTECODE_CACHE_DIR']
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+
+    app.cli.add_command(precompile_templates_command)
+
+    # Loading every template at startup keeps compilation, or loading from the bytecode cache, out of the first
+    # requests a worker serves.
+    if app.config['TEMPLATE_WARMUP']:
+        precompile_templates(app.jinja_env)
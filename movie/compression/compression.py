@@ -0,0 +1,123 @@
+import gzip
+import mimetypes
+import os
+
+import click
+from flask import current_app, request, send_from_directory
+from flask.cli import with_appcontext
+
+
+# Appended to the entity tag of gzip encoded responses, which must differ from the identity encoding's tag.
+GZIP_ETAG_SUFFIX = '-gzip'
+
+# Precompressed variants are only kept when they save at least this fraction of the original's size, so already
+# compressed formats such as PNG are served as they are.
+MIN_PRECOMPRESSION_SAVING = 0.05
+
+
+def accepts_gzip() -> bool:
+    return request.accept_encodings['gzip'] > 0
+
+
+def compress_response(response):
+    """ Gzips a response to a client that accepts it, if its type is compressible and it's big enough to benefit.
+
+    Streamed and file responses are left alone: exports are sent as they're generated, and static files are served
+    from precompressed variants instead.
+    """
+    config = current_app.config
+    if not config['COMPRESSION_ENABLED']:
+        return response
+
+    response.vary.add('Accept-Encoding')
+
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in config['COMPRESSION_MIMETYPES']
+            or not accepts_gzip()):
+        return response
+
+    data = response.get_data()
+    if len(data) < config['COMPRESSION_MIN_SIZE']:
+        return response
+
+    response.set_data(gzip.compress(data, compresslevel=config['COMPRESSION_LEVEL']))
+    response.headers['Content-Encoding'] = 'gzip'
+
+    etag, weak = response.get_etag()
+    if etag is not None:
+        response.set_etag(etag + GZIP_ETAG_SUFFIX, weak)
+
+    return response
+
+
+def serve_precompressed_static():
+    """ Serves the .gz variant of a requested static file, made by the precompress-static command, if there is one. """
+    if request.endpoint != 'static' or not current_app.config['COMPRESSION_ENABLED'] or not accepts_gzip():
+        return None
+
+    filename = request.view_args.get('filename')
+    static_folder = current_app.static_folder
+    if filename is None:
+        return None
+
+    # A variant older than its file is stale, e.g. the file was edited without rerunning the build step. One left
+    # behind by a deleted file isn't served either, so the request gets the static view's 404.
+    path = os.path.join(static_folder, filename)
+    gz_path = path + '.gz'
+    if not os.path.isfile(path) or not os.path.isfile(gz_path) or os.path.getmtime(gz_path) < os.path.getmtime(path):
+        return None
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    response = send_from_directory(static_folder, filename + '.gz', mimetype=mimetype, conditional=True)
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def precompress_directory(directory: str, compresslevel: int = 9):
+    """ Writes a .gz variant next to each file under directory for which gzip saves space.
+
+    Returns the paths of the variants written. Variants are rebuilt when their file has changed since.
+    """
+    written = list()
+
+    for dirpath, dirnames, filenames in os.walk(directory):
+        for filename in filenames:
+            if filename.endswith('.gz'):
+                continue
+            path = os.path.join(dirpath, filename)
+            gz_path = path + '.gz'
+
+            if os.path.exists(gz_path) and os.path.getmtime(gz_path) >= os.path.getmtime(path):
+                continue
+
+            with open(path, 'rb') as infile:
+                data = infile.read()
+            # mtime=0 keeps the output identical across builds.
+            compressed = gzip.compress(data, compresslevel=compresslevel, mtime=0)
+
+            if len(compressed) > len(data) * (1 - MIN_PRECOMPRESSION_SAVING):
+                if os.path.exists(gz_path):
+                    os.remove(gz_path)
+                continue
+
+            with open(gz_path, 'wb') as outfile:
+                outfile.write(compressed)
+            written.append(gz_path)
+
+    return written
+
+
+@click.command('precompress-static')
+@with_appcontext
+def precompress_static_command():
+    """ Build step: write gzip variants of the static files. """
+    for path in precompress_directory(current_app.static_folder):
+        click.echo(f'Wrote {path}')
+
+
+def init_compression(app):
+    app.before_request(serve_precompressed_static)
+    app.after_request(compress_response)
+    app.cli.add_command(precompress_static_command)
@@ -0,0 +1,240 @@
+""" Reports the memory a populated MemoryRepository retains, broken down by what it holds.
+
+Run from the repository root, e.g.:
+
+    python -m movie.diagnostics.accounting movie/adapters/data
+    python -m movie.diagnostics.accounting movie/adapters/data --trace --save-snapshot before.snapshot
+    python -m movie.diagnostics.accounting movie/adapters/data --trace --compare-snapshot before.snapshot
+"""
+import json
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict
+
+import click
+
+from movie.adapters.memory_repository import MemoryRepository, populate
+
+
+CATEGORIES = ('movies', 'descriptions', 'associations', 'people', 'users', 'reviews', 'indexes')
+
+# Attributes of the domain objects holding single values, rather than other domain objects or lists of them.
+MOVIE_VALUES = (
+    '_id', '_title', '_year', '_runtime_minutes', '_rating', '_votes', '_revenue_millions', '_meta_score',
+    '_latest_comment_timestamp'
+)
+MOVIE_LISTS = ('_genres', '_actors', '_directors', '_comments')
+MOVIE_ATTRIBUTES = len(MOVIE_VALUES) + 1 + len(MOVIE_LISTS)
+PEOPLE = (
+    ('_genres', '_genre_name', '_genre_movies'),
+    ('_actors', '_actor_name', '_actor_movies'),
+    ('_directors', '_director_name', '_director_movies')
+)
+USER_VALUES = ('_username', '_password')
+REVIEW_VALUES = ('_comment', '_timestamp')
+
+
+class MemoryAccount:
+    """ Adds up the sizes of objects by category, counting each object once, in the first category it's added to.
+
+    Instances' attributes are stored in a values array the size of a pointer per attribute, which is estimated rather
+    than measured: reading an instance's __dict__ would make Python build a dict for it, growing the repository
+    being measured.
+    """
+
+    def __init__(self):
+        self._seen = set()
+        self.bytes = OrderedDict((category, 0) for category in CATEGORIES)
+        self.objects = OrderedDict((category, 0) for category in CATEGORIES)
+
+    def add(self, category: str, obj, extra_bytes: int = 0):
+        if obj is None or id(obj) in self._seen:
+            return
+        self._seen.add(id(obj))
+        self.bytes[category] += sys.getsizeof(obj) + extra_bytes
+        self.objects[category] += 1
+
+    def add_instance(self, category: str, obj, attributes: int):
+        self.add(category, obj, extra_bytes=8 * attributes)
+
+    def add_values(self, category: str, obj, names):
+        for name in names:
+            self.add(category, getattr(obj, name))
+
+    def report(self) -> dict:
+        categories = OrderedDict(
+            (category, {'bytes': self.bytes[category], 'objects': self.objects[category]}) for category in CATEGORIES
+        )
+        return {'total_bytes': sum(self.bytes.values()), 'categories': categories}
+
+
+def repository_memory(repo: MemoryRepository) -> dict:
+    """ Returns the bytes, and number of objects, the repository retains for movies, their descriptions, the lists
+    associating movies, people and comments with each other, genres, actors and directors, users, comments, and the
+    repository's own lists and indexes.
+
+    Objects shared between categories, e.g. small integers and interned strings, are counted once.
+    """
+    # Copy the repository's collections under the read lock and walk the copies after releasing it: while the lock
+    # is held, a writer waiting for it would hold up every other reader too.
+    with repo.reading():
+        movies = list(repo._movies)
+        people = [
+            (list(getattr(repo, collection)), name_attribute, movies_attribute)
+            for collection, name_attribute, movies_attribute in PEOPLE
+        ]
+        users = list(repo._users)
+        comments = list(repo._reviews)
+        collections = (repo._movies, repo._genres, repo._actors, repo._directors, repo._users, repo._reviews)
+        indexes = [
+            (index, list(index))
+            for index in (repo._movies_index, repo._genres_index, repo._actors_index, repo._directors_index)
+        ]
+        reviews_by_movie_id = repo._reviews_by_movie_id
+        movie_reviews_lists = [(movie_reviews, list(movie_reviews)) for movie_reviews in reviews_by_movie_id.values()]
+        movie_id_indexes = repo._movie_id_indexes
+        movie_id_index_items = list(movie_id_indexes.items())
+
+    account = MemoryAccount()
+    for movie in movies:
+        account.add_instance('movies', movie, MOVIE_ATTRIBUTES)
+        account.add_values('movies', movie, MOVIE_VALUES)
+    for movie in movies:
+        account.add('descriptions', movie._description)
+    for movie in movies:
+        for name in MOVIE_LISTS:
+            account.add('associations', getattr(movie, name))
+
+    for persons, name_attribute, movies_attribute in people:
+        for person in persons:
+            account.add_instance('people', person, 2)
+            account.add('people', getattr(person, name_attribute))
+            account.add('associations', getattr(person, movies_attribute))
+
+    for user in users:
+        account.add_instance('users', user, len(USER_VALUES) + 1)
+        account.add_values('users', user, USER_VALUES)
+        account.add('associations', user._reviews)
+
+    for comment in comments:
+        account.add_instance('reviews', comment, len(REVIEW_VALUES) + 2)
+        account.add_values('reviews', comment, REVIEW_VALUES)
+
+    for collection in collections:
+        account.add('indexes', collection)
+    for index, keys in indexes:
+        account.add('indexes', index)
+        for key in keys:
+            account.add('indexes', key)
+
+    account.add('indexes', reviews_by_movie_id)
+    for movie_reviews, entries in movie_reviews_lists:
+        account.add('indexes', movie_reviews)
+        for entry in entries:
+            account.add('indexes', entry)
+            account.add('indexes', entry[0])
+            account.add('indexes', entry[1])
+
+    account.add('indexes', movie_id_indexes)
+    for key, entry in movie_id_index_items:
+        account.add('indexes', key)
+        account.add('indexes', entry)
+        for part in entry:
+            account.add('indexes', part)
+
+    return account.report()
+
+
+def trace_populate(data_path: str, frames: int = 1, top: int = 20, baseline: tracemalloc.Snapshot = None):
+    """ Populates a new repository from data_path while tracing allocations with tracemalloc.
+
+    Returns the repository, a report of the memory populating allocated and still holds, by source line, and the
+    snapshot taken afterwards. With a baseline snapshot, e.g. saved from another commit, the report compares the two
+    instead.
+    """
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start(frames)
+
+    try:
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        started = time.perf_counter()
+        repo = MemoryRepository()
+        populate(data_path, repo)
+        seconds = time.perf_counter() - started
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    # Only what populating allocated, not the tracing itself.
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    after = after.filter_traces(filters)
+    differences = after.compare_to((baseline or before).filter_traces(filters), 'lineno')
+
+    report = {
+        'populate_seconds': seconds,
+        'retained_bytes': sum(difference.size_diff for difference in after.compare_to(before, 'lineno')),
+        'peak_bytes': peak,
+        'traced_bytes': current,
+        'compared_with': 'baseline' if baseline is not None else 'before populate',
+        'top': [
+            {
+                'location': str(difference.traceback),
+                'size_bytes': difference.size,
+                'size_diff_bytes': difference.size_diff,
+                'count_diff': difference.count_diff
+            }
+            for difference in differences[:top]
+        ]
+    }
+    return repo, report, after
+
+
+def format_report(report: dict) -> str:
+    lines = [f'{"category":<14} {"bytes":>14} {"objects":>10}']
+    for category, values in report['categories'].items():
+        lines.append(f'{category:<14} {values["bytes"]:>14,} {values["objects"]:>10,}')
+    lines.append(f'{"total":<14} {report["total_bytes"]:>14,}')
+    return '\n'.join(lines)
+
+
+@click.command('memory-report')
+@click.argument('data_path')
+@click.option('--trace', is_flag=True, help='Trace allocations made by populate() with tracemalloc.')
+@click.option('--top', default=20, help='Number of source lines reported when tracing.')
+@click.option('--save-snapshot', help='File to save the traced snapshot to, to compare a later run with.')
+@click.option('--compare-snapshot', help='Snapshot file saved by an earlier run to compare with.')
+@click.option('--as-json', is_flag=True, help='Print the report as JSON.')
+def memory_report_command(data_path, trace, top, save_snapshot, compare_snapshot, as_json):
+    """ Populates a repository from DATA_PATH and reports the memory it retains. """
+    result = dict()
+    if trace or save_snapshot or compare_snapshot:
+        baseline = tracemalloc.Snapshot.load(compare_snapshot) if compare_snapshot else None
+        repo, result['populate'], snapshot = trace_populate(data_path, top=top, baseline=baseline)
+        if save_snapshot:
+            snapshot.dump(save_snapshot)
+    else:
+        repo = MemoryRepository()
+        populate(data_path, repo)
+    result['repository'] = repository_memory(repo)
+
+    if as_json:
+        click.echo(json.dumps(result, indent=2))
+        return
+
+    click.echo(format_report(result['repository']))
+    if 'populate' in result:
+        populate_report = result['populate']
+        click.echo(f'\npopulate() took {populate_report["populate_seconds"]:.2f}s, retained '
+                   f'{populate_report["retained_bytes"]:,} bytes and peaked at {populate_report["peak_bytes"]:,} '
+                   f'traced bytes. Allocations compared with {populate_report["compared_with"]}:')
+        for entry in populate_report['top']:
+            click.echo(f'{entry["size_diff_bytes"]:>+14,} {entry["count_diff"]:>+10,}  {entry["location"]}')
+
+
+if __name__ == '__main__':
+    memory_report_command()
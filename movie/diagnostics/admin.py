@@ -0,0 +1,27 @@
+import hmac
+from functools import wraps
+
+from flask import abort, current_app, request, session
+
+
+def is_admin() -> bool:
+    """ Returns whether the current request is made by an administrator: a logged in user named in ADMIN_USERNAMES,
+    or a client sending ADMIN_TOKEN in an X-Admin-Token header.
+    """
+    token = current_app.config.get('ADMIN_TOKEN')
+    supplied_token = request.headers.get('X-Admin-Token')
+    if token and supplied_token and hmac.compare_digest(token.encode('utf-8'), supplied_token.encode('utf-8')):
+        return True
+
+    username = session.get('username')
+    return username is not None and username in current_app.config.get('ADMIN_USERNAMES', ())
+
+
+def admin_required(view):
+    # Diagnostics reveal how the app works inside, so anyone else is told they don't exist.
+    @wraps(view)
+    def wrapped_view(**kwargs):
+        if not is_admin():
+            abort(404)
+        return view(**kwargs)
+    return wrapped_view
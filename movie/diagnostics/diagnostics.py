@@ -0,0 +1,42 @@
+import os
+
+from flask import Blueprint, abort, current_app, jsonify
+
+import movie.adapters.repository as repo
+from movie.diagnostics.accounting import repository_memory
+from movie.diagnostics.admin import admin_required
+from movie.preload.memory import process_memory
+
+
+# Configure Blueprint.
+diagnostics_blueprint = Blueprint(
+    'diagnostics_bp', __name__)
+
+
+@diagnostics_blueprint.route('/metrics', methods=['GET'])
+def metrics():
+    registry = current_app.extensions.get('metrics')
+    if registry is None:
+        abort(404)
+    return current_app.response_class(registry.expose(current_app), mimetype='text/plain; version=0.0.4')
+
+
+@diagnostics_blueprint.route('/admin/memory', methods=['GET'])
+@admin_required
+def memory():
+    # Walking a large catalog takes a while, so this is for occasional use by administrators.
+    report = {'repository': repository_memory(repo.repo_instance)}
+    try:
+        report['process'] = process_memory(os.getpid())
+    except OSError:
+        # /proc is only available on Linux.
+        report['process'] = None
+    return jsonify(report)
+
+
+@diagnostics_blueprint.route('/admin/startup', methods=['GET'])
+@admin_required
+def startup():
+    report = current_app.extensions['startup_timer'].report()
+    report['catalog'] = current_app.extensions['catalog_loader'].status()
+    return jsonify(report)
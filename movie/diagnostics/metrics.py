@@ -0,0 +1,303 @@
+import functools
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, request
+
+import movie.adapters.repository as repo
+
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+REPOSITORY_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+# Repository methods that are timed, including the facet lookups behind every movie listing.
+REPOSITORY_OPERATIONS = (
+    'get_movie_ids_for_genre', 'get_movie_ids_for_actor', 'get_movie_ids_for_director', 'get_movie_id_index',
+    'get_movies_by_id', 'get_movies_and_missing_ids', 'add_review'
+)
+
+
+class ThreadShards:
+    """ Rows of numbers, keyed by label values, that each thread adds to in its own shard and that are summed when
+    read.
+
+    A thread only ever writes to its own shard, so updates take no lock and request threads never wait on each other
+    to count. The lock is only taken the first time a thread updates and when the totals are read. Shards of threads
+    that have finished are folded into one, so a server starting a thread per request doesn't pile them up.
+    """
+
+    def __init__(self, width: int):
+        self._width = width
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = list()
+        self._retired = dict()
+
+    def row(self, key) -> list:
+        """ Returns the current thread's row for key, which only this thread may change. """
+        rows = getattr(self._local, 'rows', None)
+        if rows is None:
+            rows = self._local.rows = dict()
+            with self._lock:
+                self._retire_finished_threads()
+                self._shards.append((threading.current_thread(), rows))
+
+        row = rows.get(key)
+        if row is None:
+            row = rows[key] = [0] * self._width
+        return row
+
+    def totals(self) -> dict:
+        with self._lock:
+            self._retire_finished_threads()
+            totals = {key: list(row) for key, row in self._retired.items()}
+            for thread, rows in self._shards:
+                for key, row in list(rows.items()):
+                    _add_row(totals, key, row)
+        return totals
+
+    def _retire_finished_threads(self):
+        live = list()
+        for thread, rows in self._shards:
+            if thread.is_alive():
+                live.append((thread, rows))
+            else:
+                for key, row in rows.items():
+                    _add_row(self._retired, key, row)
+        self._shards = live
+
+
+def _add_row(totals: dict, key, row: list):
+    total = totals.get(key)
+    if total is None:
+        totals[key] = list(row)
+    else:
+        for index, value in enumerate(row):
+            total[index] += value
+
+
+class Counter:
+
+    def __init__(self, name: str, help_text: str, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._shards = ThreadShards(1)
+
+    def inc(self, *label_values, amount=1):
+        self._shards.row(label_values)[0] += amount
+
+    def expose(self) -> list:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        for label_values, (value,) in sorted(self._shards.totals().items()):
+            lines.append(sample(self.name, dict(zip(self.label_names, label_values)), value))
+        return lines
+
+
+class Histogram:
+
+    def __init__(self, name: str, help_text: str, label_names=(), buckets=REQUEST_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # A count for each bucket, one for values above the last bucket, and the sum of the values.
+        self._shards = ThreadShards(len(self.buckets) + 2)
+
+    def observe(self, value: float, *label_values):
+        row = self._shards.row(label_values)
+        row[bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    def expose(self) -> list:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for label_values, row in sorted(self._shards.totals().items()):
+            labels = dict(zip(self.label_names, label_values))
+            cumulative = 0
+            for upper_bound, count in zip(self.buckets + ('+Inf',), row):
+                cumulative += count
+                lines.append(sample(f'{self.name}_bucket', dict(labels, le=upper_bound), cumulative))
+            lines.append(sample(f'{self.name}_sum', labels, row[-1]))
+            lines.append(sample(f'{self.name}_count', labels, cumulative))
+        return lines
+
+
+def collected(name: str, metric_type: str, help_text: str, samples) -> list:
+    """ Returns the exposition lines of a gauge or counter read when scraped, from (labels, value) pairs. """
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} {metric_type}']
+    for labels, value in samples:
+        lines.append(sample(name, labels, value))
+    return lines
+
+
+def sample(name: str, labels: dict, value) -> str:
+    if labels:
+        label_text = ','.join(f'{label}="{_escape(label_value)}"' for label, label_value in labels.items())
+        name = f'{name}{{{label_text}}}'
+    return f'{name} {_format_value(value)}'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value) -> str:
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """ Request and repository metrics for an app, and the stats of its caches, password hashing pool and rate
+    limiter, in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self.requests = Counter(
+            'http_requests_total', 'Requests answered, by blueprint, endpoint, method and status.',
+            ('blueprint', 'endpoint', 'method', 'status')
+        )
+        self.request_seconds = Histogram(
+            'http_request_duration_seconds', 'Seconds taken to answer requests, by blueprint.', ('blueprint',)
+        )
+        self.repository_seconds = Histogram(
+            'movie_repository_operation_duration_seconds',
+            'Seconds taken by repository operations; the count is the number of calls.', ('operation',),
+            REPOSITORY_BUCKETS
+        )
+
+    def init_app(self, app):
+        app.extensions['metrics'] = self
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    def instrument_repository(self, repository):
+        """ Times calls of the repository's REPOSITORY_OPERATIONS, by wrapping the methods of this one instance. """
+        for operation in REPOSITORY_OPERATIONS:
+            method = getattr(repository, operation, None)
+            if method is not None:
+                setattr(repository, operation, self._timed(operation, method))
+
+    def expose(self, app) -> str:
+        lines = self.requests.expose() + self.request_seconds.expose() + self.repository_seconds.expose()
+        for collect in (_catalog_metrics, _cache_metrics, _kdf_pool_metrics, _rate_limiter_metrics):
+            lines += collect(app)
+        return '\n'.join(lines) + '\n'
+
+    def _timed(self, operation: str, method):
+        histogram = self.repository_seconds
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started, operation)
+        return timed
+
+    def _start_request(self):
+        g.metrics_started = time.perf_counter()
+
+    def _finish_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            blueprint = request.blueprint or 'app'
+            self.request_seconds.observe(time.perf_counter() - started, blueprint)
+            self.requests.inc(blueprint, request.endpoint or 'none', request.method, response.status_code)
+        return response
+
+
+def _catalog_metrics(app) -> list:
+    lines = list()
+    repository = repo.repo_instance
+    if repository is not None:
+        lines += collected('movie_catalog_size', 'gauge', 'Number of entries in the catalog, by collection.', [
+            ({'collection': 'movies'}, repository.get_number_of_movies()),
+            ({'collection': 'genres'}, len(repository.get_genres())),
+            ({'collection': 'actors'}, len(repository.get_actors())),
+            ({'collection': 'directors'}, len(repository.get_directors())),
+            ({'collection': 'users'}, repository.get_number_of_users()),
+            ({'collection': 'reviews'}, repository.get_number_of_reviews())
+        ])
+
+    loader = app.extensions.get('catalog_loader')
+    if loader is not None:
+        status = loader.status()
+        lines += collected('movie_catalog_ready', 'gauge', 'Whether the catalog has been loaded.', [({}, loader.ready)])
+        if status['elapsed_seconds'] is not None:
+            lines += collected('movie_catalog_load_duration_seconds', 'gauge',
+                               'Seconds spent loading the catalog so far.', [({}, status['elapsed_seconds'])])
+        lines += collected('movie_catalog_load_phase_duration_seconds', 'gauge',
+                           'Seconds each phase of loading the catalog took.',
+                           [({'phase': phase}, seconds) for phase, seconds in status['phase_seconds'].items()])
+    return lines
+
+
+def _cache_metrics(app) -> list:
+    caches = list()
+    response_cache = app.extensions.get('response_cache')
+    if response_cache is not None:
+        caches.append(('response', response_cache.stats()))
+    fragment_cache = getattr(app.jinja_env, 'fragment_cache', None)
+    if fragment_cache is not None:
+        caches.append(('fragment', fragment_cache.stats()))
+    if not caches:
+        return []
+
+    lines = collected('movie_cache_entries', 'gauge', 'Entries held, by cache.',
+                      [({'cache': name}, stats['size']) for name, stats in caches])
+    for stat in ('hits', 'misses', 'evictions'):
+        lines += collected(f'movie_cache_{stat}_total', 'counter', f'Cache {stat}, by cache.',
+                           [({'cache': name}, stats[stat]) for name, stats in caches])
+    return lines
+
+
+def _kdf_pool_metrics(app) -> list:
+    kdf_pool = app.extensions.get('kdf_pool')
+    if kdf_pool is None:
+        return []
+
+    stats = kdf_pool.stats()
+    return (
+        collected('movie_kdf_pool_in_flight', 'gauge', 'Password hashes and checks running or waiting for a worker.',
+                  [({}, stats['in_flight'])])
+        + collected('movie_kdf_pool_completed_total', 'counter', 'Password hashes and checks completed.',
+                    [({}, stats['completed'])])
+        + collected('movie_kdf_pool_rejected_total', 'counter',
+                    'Logins and registrations refused because the pool was full.', [({}, stats['rejected'])])
+        + collected('movie_kdf_pool_wait_seconds_total', 'counter',
+                    'Seconds password hashes and checks spent waiting for a worker.',
+                    [({}, stats['wait_seconds_total'])])
+    )
+
+
+def _rate_limiter_metrics(app) -> list:
+    rate_limiter = app.extensions.get('rate_limiter')
+    if rate_limiter is None:
+        return []
+
+    stats = rate_limiter.stats()
+    return (
+        collected('movie_rate_limited_total', 'counter',
+                  'Requests refused with 429 because the client was over budget.', [({}, stats['limited'])])
+        + collected('movie_load_shed_total', 'counter',
+                    'Requests refused with 503 because the endpoint was at its concurrency limit.',
+                    [({}, stats['shed'])])
+    )
+
+
+def init_metrics(app):
+    if not app.config['METRICS_ENABLED']:
+        return
+    Metrics().init_app(app)
+
+
+def init_repository_metrics(app, repository):
+    metrics = app.extensions.get('metrics')
+    if metrics is not None:
+        metrics.instrument_repository(repository)
@@ -0,0 +1,89 @@
+import cProfile
+import os
+import pstats
+import threading
+import time
+import uuid
+
+from flask import g, request
+
+from movie.diagnostics.admin import is_admin
+
+
+# Values of the profile query parameter and X-Profile header that don't ask for a profile.
+OFF_VALUES = ('', '0', 'false', 'no', 'off')
+
+
+def is_on(value: str) -> bool:
+    return value is not None and value.strip().lower() not in OFF_VALUES
+
+
+class RequestProfiler:
+    """ Profiles single requests with cProfile when an administrator asks, with a profile query parameter or an
+    X-Profile header, and writes the stats to a directory.
+
+    Each profile is written as NAME.prof, which pstats, snakeviz or 'python -m pstats' can read, and NAME.txt, the
+    functions taking the most cumulative time. NAME is returned in the response's X-Profile header. Only one request
+    is profiled at a time; another asking while one is in progress is served without a profile and gets
+    'X-Profile: busy'. A streamed response is only profiled until the view returns it.
+    """
+
+    def __init__(self, directory: str, top: int = 50):
+        self._directory = directory
+        self._top = top
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.extensions['profiler'] = self
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._abandon)
+
+    def save(self, profile: cProfile.Profile, name: str) -> str:
+        """ Writes the profile's stats to the directory and returns the name they're written under. """
+        os.makedirs(self._directory, exist_ok=True)
+        path = os.path.join(self._directory, name)
+        profile.dump_stats(path + '.prof')
+        with open(path + '.txt', 'w') as summary:
+            pstats.Stats(profile, stream=summary).sort_stats('cumulative').print_stats(self._top)
+        return name
+
+    def _start(self):
+        if not (is_on(request.args.get('profile')) or is_on(request.headers.get('X-Profile'))) or not is_admin():
+            return None
+
+        if not self._lock.acquire(blocking=False):
+            g.profile_busy = True
+            return None
+
+        g.profile = cProfile.Profile()
+        g.profile.enable()
+        return None
+
+    def _finish(self, response):
+        profile = g.pop('profile', None)
+        if profile is None:
+            if g.pop('profile_busy', False):
+                response.headers['X-Profile'] = 'busy'
+            return response
+
+        profile.disable()
+        try:
+            name = f'{time.strftime("%Y%m%d-%H%M%S")}-{request.endpoint}-{uuid.uuid4().hex[:8]}'
+            response.headers['X-Profile'] = self.save(profile, name)
+        finally:
+            self._lock.release()
+        return response
+
+    def _abandon(self, exc):
+        # A request that raised never reached _finish.
+        profile = g.pop('profile', None)
+        if profile is not None:
+            profile.disable()
+            self._lock.release()
+
+
+def init_profiling(app):
+    if not app.config['PROFILING_ENABLED']:
+        return
+    RequestProfiler(app.config['PROFILE_DIR']).init_app(app)
@@ -0,0 +1,98 @@
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where the peak resident memory isn't reported.
+    resource = None
+
+
+logger = logging.getLogger(__name__)
+
+
+def max_rss_kb() -> int:
+    """ Returns the most resident memory the process has used so far, in kB, or None where it isn't known. """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kB.
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+class StartupTimer:
+    """ Records the wall time of each phase of starting the app, and how much memory the process had used by the end
+    of it.
+
+    Each phase reports the process's peak resident memory so far and, while tracemalloc is tracing, the memory
+    allocated by Python and its peak so far. The peaks are high-water marks for the whole process, so the phase that
+    raised one is the first to report it. Phases of populating the catalog are named 'populate.movies' and so on;
+    with BACKGROUND_POPULATE, they're recorded on the loader's thread after create_app returns.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._current = None
+        self.started = clock()
+        self.finished = None
+        self.phases = list()
+
+    def start_phase(self, name: str):
+        """ Ends the current phase, if any, and starts timing the named one. """
+        self.end_phase()
+        self._current = (name, self._clock())
+
+    def end_phase(self):
+        if self._current is not None:
+            name, started = self._current
+            self._current = None
+            self.record(name, started, self._clock() - started)
+
+    def finish(self):
+        self.end_phase()
+        self.finished = self._clock()
+
+    def record(self, name: str, started: float, seconds: float):
+        phase = {'name': name, 'start_seconds': started - self.started, 'seconds': seconds, 'max_rss_kb': max_rss_kb()}
+        if tracemalloc.is_tracing():
+            phase['traced_bytes'], phase['traced_peak_bytes'] = tracemalloc.get_traced_memory()
+        with self._lock:
+            self.phases.append(phase)
+
+    def populate_listener(self, phase: str, seconds: float):
+        """ Records a phase of populating the catalog; pass to CatalogLoader.phase_listeners. """
+        self.record(f'populate.{phase}', self._clock() - seconds, seconds)
+
+    def report(self) -> dict:
+        with self._lock:
+            phases = sorted((dict(phase) for phase in self.phases), key=lambda phase: phase['start_seconds'])
+        return {
+            'create_app_seconds': self.finished - self.started if self.finished is not None else None,
+            'phases': phases
+        }
+
+    def summary(self) -> str:
+        report = self.report()
+        parts = [f'{phase["name"]} {phase["seconds"] * 1000:.1f}ms' for phase in report['phases']]
+        total = report['create_app_seconds']
+        return f'create_app took {total * 1000:.1f}ms: ' + ', '.join(parts) + f'; peak RSS {max_rss_kb()} kB'
+
+
+def init_startup_timer(app, timer: StartupTimer):
+    app.extensions['startup_timer'] = timer
+    # Tracing slows start up down, so it's only done when asked for; it's stopped again once the app is created.
+    if app.config['STARTUP_TRACE_MEMORY'] and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        app.extensions['startup_tracing'] = True
+
+
+def finish_startup_timer(app):
+    timer = app.extensions['startup_timer']
+    timer.finish()
+    if app.extensions.pop('startup_tracing', False):
+        tracemalloc.stop()
+    logger.info(timer.summary())
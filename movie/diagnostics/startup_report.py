@@ -0,0 +1,102 @@
+""" Reports how long each phase of creating the app takes, and optionally the imports before it.
+
+Run from the repository root, e.g.:
+
+    python -m movie.diagnostics.startup_report
+    python -m movie.diagnostics.startup_report --trace-memory --data benchmarks/data/100000
+    python -m movie.diagnostics.startup_report --startup-profile
+
+--startup-profile runs the app's start up again in a child process with 'python -X importtime', and adds the
+imports that took longest to the report.
+"""
+import json
+import os
+import subprocess
+import sys
+
+import click
+
+
+def parse_import_times(stderr: str) -> list:
+    """ Returns the modules listed by 'python -X importtime', as dicts of their self and cumulative microseconds and
+    how deeply nested their import was, 0 for modules imported at the top level.
+    """
+    imports = list()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            # The header line.
+            continue
+        module = fields[2].rstrip()
+        imports.append({
+            'module': module.strip(),
+            'depth': (len(module) - len(module.lstrip()) - 1) // 2,
+            'self_us': int(fields[0]),
+            'cumulative_us': int(fields[1])
+        })
+    return imports
+
+
+def profile_imports(argv, top: int = 20) -> dict:
+    """ Runs this module in a child process under 'python -X importtime' with the given arguments, and returns its
+    report with the top imports by cumulative time added.
+    """
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-m', 'movie.diagnostics.startup_report', '--as-json'] + list(argv),
+        capture_output=True, text=True, check=True
+    )
+    report = json.loads(completed.stdout)
+    imports = parse_import_times(completed.stderr)
+    report['imports'] = {
+        'modules': len(imports),
+        # Top level imports add up to the total, as each module's cumulative time includes the modules it imported.
+        'total_us': sum(entry['cumulative_us'] for entry in imports if entry['depth'] == 0),
+        'top': sorted(imports, key=lambda entry: entry['cumulative_us'], reverse=True)[:top]
+    }
+    return report
+
+
+def format_report(report: dict) -> str:
+    lines = [f'{"phase":<22} {"start ms":>10} {"ms":>10} {"max RSS kB":>12} {"traced peak":>14}']
+    for phase in report['phases']:
+        traced_peak = phase.get('traced_peak_bytes')
+        lines.append(f'{phase["name"]:<22} {phase["start_seconds"] * 1000:>10.1f} {phase["seconds"] * 1000:>10.1f} '
+                     f'{phase["max_rss_kb"] or "":>12} {traced_peak if traced_peak is not None else "":>14}')
+    lines.append(f'{"create_app":<22} {"":>10} {report["create_app_seconds"] * 1000:>10.1f}')
+
+    if 'imports' in report:
+        imports = report['imports']
+        lines.append(f'\n{imports["modules"]} modules imported in {imports["total_us"] / 1000:.1f}ms; slowest:')
+        for entry in imports['top']:
+            lines.append(f'{entry["cumulative_us"] / 1000:>10.1f}ms {entry["self_us"] / 1000:>8.1f}ms  '
+                         f'{entry["module"]}')
+    return '\n'.join(lines)
+
+
+@click.command('startup-report')
+@click.option('--data', 'data_path', help='Data directory to load, instead of movie/adapters/data.')
+@click.option('--trace-memory', is_flag=True, help='Trace memory allocated in each phase with tracemalloc.')
+@click.option('--startup-profile', is_flag=True, help='Also time imports, with python -X importtime.')
+@click.option('--top', default=20, help='Number of imports reported with --startup-profile.')
+@click.option('--as-json', is_flag=True, help='Print the report as JSON.')
+def startup_report_command(data_path, trace_memory, startup_profile, top, as_json):
+    """ Creates the app and reports how long each phase of starting it took. """
+    if startup_profile:
+        argv = (['--data', data_path] if data_path else []) + (['--trace-memory'] if trace_memory else [])
+        report = profile_imports(argv, top)
+    else:
+        from movie import create_app
+
+        app = create_app({
+            'TEST_DATA_PATH': data_path or os.path.join('movie', 'adapters', 'data'),
+            'STARTUP_TRACE_MEMORY': trace_memory
+        })
+        report = app.extensions['startup_timer'].report()
+
+    click.echo(json.dumps(report, indent=2) if as_json else format_report(report))
+
+
+if __name__ == '__main__':
+    startup_report_command()
@@ -0,0 +1,92 @@
+import json
+import logging
+import time
+from contextlib import nullcontext
+
+from flask import g, has_app_context, request
+
+
+logger = logging.getLogger(__name__)
+
+# Returned by phase() when the request isn't being timed; it does nothing, so can be shared.
+_untimed = nullcontext()
+
+
+class RequestTimer:
+    """ Adds up the time a request spends in each named phase. A phase entered more than once, e.g. 'sidebar' for
+    each of the genre, actor and director lists, accumulates.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self.started = clock()
+        self.phases = dict()
+
+    def phase(self, name: str):
+        return _Phase(self, name)
+
+    def elapsed(self) -> float:
+        return self._clock() - self.started
+
+    def header(self, total: float) -> str:
+        """ Returns a Server-Timing header value, with durations in milliseconds. """
+        metrics = [f'{name};dur={seconds * 1000:.2f}' for name, seconds in self.phases.items()]
+        metrics.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(metrics)
+
+
+class _Phase:
+    __slots__ = ('_timer', '_name', '_started')
+
+    def __init__(self, timer: RequestTimer, name: str):
+        self._timer = timer
+        self._name = name
+
+    def __enter__(self):
+        self._started = self._timer._clock()
+        return self
+
+    def __exit__(self, *exc):
+        phases = self._timer.phases
+        phases[self._name] = phases.get(self._name, 0.0) + self._timer._clock() - self._started
+        return False
+
+
+def phase(name: str):
+    """ Returns a context manager timing the code it wraps as the named phase of the current request, or doing
+    nothing if the request isn't being timed.
+    """
+    timer = g.get('request_timer') if has_app_context() else None
+    if timer is None:
+        return _untimed
+    return timer.phase(name)
+
+
+def start_timer():
+    g.request_timer = RequestTimer()
+
+
+def report_timing(response):
+    timer = g.pop('request_timer', None)
+    if timer is None:
+        return response
+
+    total = timer.elapsed()
+    response.headers['Server-Timing'] = timer.header(total)
+    logger.info(json.dumps({
+        'event': 'request_timing',
+        'method': request.method,
+        'path': request.path,
+        'endpoint': request.endpoint,
+        'status': response.status_code,
+        'total_ms': round(total * 1000, 3),
+        'phases_ms': {name: round(seconds * 1000, 3) for name, seconds in timer.phases.items()}
+    }))
+    return response
+
+
+def init_server_timing(app):
+    if not app.config['SERVER_TIMING_ENABLED']:
+        return
+    app.before_request(start_timer)
+    app.after_request(report_timing)
@@ -26,6 +26,10 @@ class User:
     def add_review(self, review: 'Review'):
         self._reviews.append(review)
 
+    def has_review(self, review: 'Review') -> bool:
+        # make_review adds a Review last, so check the last one before comparing every Review.
+        return bool(self._reviews) and self._reviews[-1] is review or review in self._reviews
+
     def __repr__(self) -> str:
         return f'<User {self._username} {self._password}>'
 
@@ -97,6 +101,7 @@ class Movie:
         self._meta_score: int = meta_score
 
         self._comments: List[Review] = list()
+        self._latest_comment_timestamp: datetime = None
 
         self._genres: List[Genre] = list()
         self._actors: List[Actor] = list()
@@ -146,6 +151,10 @@ class Movie:
     def number_of_comments(self) -> int:
         return len(self._comments)
 
+    @property
+    def latest_comment_timestamp(self) -> datetime:
+        return self._latest_comment_timestamp
+
     @property
     def genres(self) -> Iterable['Genre']:
         return iter(self._genres)
@@ -188,8 +197,16 @@ class Movie:
     def has_directors(self) -> bool:
         return len(self._directors) > 0
 
+    def has_comment(self, comment: Review) -> bool:
+        # make_review adds a Comment last, so check the last one before comparing every Comment.
+        return bool(self._comments) and self._comments[-1] is comment or comment in self._comments
+
     def add_comment(self, comment: Review):
         self._comments.append(comment)
+        if comment.timestamp is None:
+            return
+        if self._latest_comment_timestamp is None or comment.timestamp > self._latest_comment_timestamp:
+            self._latest_comment_timestamp = comment.timestamp
 
     def add_genre(self, genre: 'Genre'):
         self._genres.append(genre)
@@ -320,7 +337,10 @@ class ModelException(Exception):
     pass
 
 
-def make_review(comment_text: str, user: User, movie: Movie, timestamp: datetime = datetime.today()):
+def make_review(comment_text: str, user: User, movie: Movie, timestamp: datetime = None):
+    if timestamp is None:
+        # Evaluated per call; a default argument value would be fixed when the module is imported.
+        timestamp = datetime.today()
     comment = Review(user, movie, comment_text, timestamp)
     user.add_review(comment)
     movie.add_comment(comment)
@@ -329,7 +349,8 @@ def make_review(comment_text: str, user: User, movie: Movie, timestamp: datetime
 
 # TODO: association: genre, actor, director
 def make_genre_association(movie: Movie, genre: Genre):
-    if genre.is_applied_to(movie):
+    # A Movie has a few genres, while a Genre can have thousands of Movies, so check the Movie's side.
+    if movie.is_genre_by(genre):
         raise ModelException(f'Genre {genre.genre_name} already applied to Movie "{movie.title}"')
 
     movie.add_genre(genre)
@@ -337,7 +358,8 @@ def make_genre_association(movie: Movie, genre: Genre):
 
 
 def make_actor_association(movie: Movie, actor: Actor):
-    if actor.is_applied_to(movie):
+    # A Movie has a few actors, while a Actor can have thousands of Movies, so check the Movie's side.
+    if movie.is_actor_by(actor):
         raise ModelException(f'Actor {actor.actor_name} already applied to Movie "{movie.title}"')
 
     movie.add_actor(actor)
@@ -345,7 +367,8 @@ def make_actor_association(movie: Movie, actor: Actor):
 
 
 def make_director_association(movie: Movie, director: Director):
-    if director.is_applied_to(movie):
+    # A Movie has a few directors, while a Director can have thousands of Movies, so check the Movie's side.
+    if movie.is_director_by(director):
         raise ModelException(f'Director {director.director_name} already applied to Movie "{movie.title}"')
 
     movie.add_director(director)
@@ -0,0 +1,37 @@
+from flask import Blueprint, current_app, jsonify, request
+
+
+# Configure Blueprint.
+health_blueprint = Blueprint(
+    'health_bp', __name__)
+
+
+@health_blueprint.route('/healthz', methods=['GET'])
+def healthz():
+    # The process is up and serving requests, whether or not the catalog has been loaded.
+    return jsonify(status='ok')
+
+
+@health_blueprint.route('/readyz', methods=['GET'])
+def readyz():
+    loader = current_app.extensions['catalog_loader']
+    response = jsonify(loader.status())
+    if not loader.ready:
+        response.status_code = 503
+    return response
+
+
+def require_catalog():
+    # Until the repository is populated, every route except the health checks, diagnostics and static files answers
+    # 503.
+    if request.endpoint == 'static' or request.blueprint in ('health_bp', 'diagnostics_bp'):
+        return None
+
+    loader = current_app.extensions['catalog_loader']
+    if loader.ready:
+        return None
+
+    response = current_app.response_class('The movie catalog is still loading, please try again shortly.',
+                                          status=503, mimetype='text/plain')
+    response.headers['Retry-After'] = str(current_app.config['NOT_READY_RETRY_AFTER'])
+    return response
@@ -12,8 +12,8 @@ def home():
     return render_template(
         'home/home.html',
 
-        genre_urls=utilities.get_genres_and_urls(),
-        actor_urls=utilities.get_actors_and_urls(),
-        director_urls=utilities.get_directors_and_urls(),
+        genre_names=utilities.get_genre_names,
+        actor_names=utilities.get_actor_names,
+        director_names=utilities.get_director_names,
 
     )
@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+
+import movie.api.services as api_services
+
+
+# Exports include each movie's comments unless the client picks its own fields.
+DEFAULT_EXPORT_FIELDS = api_services.DEFAULT_MOVIE_FIELDS + ('comments',)
+
+EXPORT_MIMETYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+
+def export_rows(movies, fields, export_format: str, rows_per_chunk: int = 100):
+    """ Yields the movies serialized in export_format, as text chunks of up to rows_per_chunk rows.
+
+    Each chunk is produced only when the server asks for it, i.e. once the previous chunk has been written to the
+    client, so a slow client holds back serialization instead of buffering the export in memory.
+    """
+    if export_format == 'csv':
+        serialize_row, header = csv_row_serializer(fields)
+    else:
+        serialize_row, header = ndjson_row, None
+
+    chunk = list()
+    if header is not None:
+        chunk.append(header)
+
+    for movie in movies:
+        chunk.append(serialize_row(api_services.movie_to_flat_dict(movie, fields)))
+        if len(chunk) >= rows_per_chunk:
+            yield ''.join(chunk)
+            chunk = list()
+
+    if chunk:
+        yield ''.join(chunk)
+
+
+def ndjson_row(movie_dict):
+    return json.dumps(movie_dict) + '\n'
+
+
+def csv_row_serializer(fields):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def write(values):
+        writer.writerow(values)
+        row = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return row
+
+    def serialize_row(movie_dict):
+        return write([csv_value(movie_dict[field]) for field in fields])
+
+    return serialize_row, write(fields)
+
+
+def csv_value(value):
+    # Names of genres, actors and directors are joined with '|'; comments, which are dicts, are written as JSON.
+    if isinstance(value, list):
+        if value and isinstance(value[0], dict):
+            return json.dumps(value)
+        return '|'.join(value)
+    return value
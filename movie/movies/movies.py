@@ -1,9 +1,9 @@
+import time
 from datetime import date
 
-from flask import Blueprint
-from flask import request, render_template, redirect, url_for, session
+from flask import Blueprint, current_app
+from flask import request, render_template, redirect, url_for, session, make_response, Response, stream_with_context
 
-from better_profanity import profanity
 from flask_wtf import FlaskForm
 from wtforms import TextAreaField, HiddenField, SubmitField
 from wtforms.validators import DataRequired, Length, ValidationError
@@ -11,6 +11,13 @@ from wtforms.validators import DataRequired, Length, ValidationError
 import movie.adapters.repository as repo
 import movie.utilities.utilities as utilities
 import movie.movies.services as services
+import movie.movies.export as export
+import movie.movies.profanity as profanity
+import movie.api.services as api_services
+
+from movie.caching.conditional import make_etag, last_modified_from, not_modified, set_validators
+from movie.caching.response_cache import tag_movies
+from movie.diagnostics.timing import phase
 
 from movie.authentication.authentication import login_required
 
@@ -21,16 +28,19 @@ movies_blueprint = Blueprint(
 
 @movies_blueprint.route('/movies_by_genre', methods=['GET'])
 def movies_by_genre():
-    movies_per_page = 3
-
     # Read query parameters.
     genre_name = request.args.get('genre')
     actor_name = request.args.get('actor')
     director_name = request.args.get('director')
-    # pagination cursor
+    # pagination cursor, an opaque keyset cursor produced by services.encode_cursor
     cursor = request.args.get('cursor')
+    # movies per page, only passed on in page URLs if the client chose it
+    per_page = request.args.get('per_page')
+    movies_per_page = page_size(per_page)
     # comment
     movie_to_show_comments = request.args.get('view_comments_for')
+    # position of the first comment shown for movie_to_show_comments
+    comments_start = request.args.get('comments_start', 0, type=int)
 
     if movie_to_show_comments is None:
         # No view-comments query parameter, so set to a non-existent movie id.
@@ -39,13 +49,6 @@ def movies_by_genre():
         # Convert movie_to_show_comments  from string to int.
         movie_to_show_comments = int(movie_to_show_comments)
 
-    if cursor is None:
-        # No cursor query parameter, so initialise cursor to start at the beginning.
-        cursor = 0
-    else:
-        # Convert cursor from string to int.
-        cursor = int(cursor)
-
     # print(genre_name)
     # print(actor_name)
     # print(director_name)
@@ -62,92 +65,131 @@ def movies_by_genre():
     else:
         director_name = ''
 
-    movie_ids_all = services.get_movie_ids_all(repo.repo_instance)
-    movie_ids = movie_ids_all
-
-    # https://www.kite.com/python/answers/how-to-find-the-intersection-of-two-lists-in-python
-    # list1 = [1, 2, 3]
-    # list2 = [1, 3, 5]
-    # intersection_set = set.intersection(set(list1), set(list2))
-    # find intersection of list1 and list2
-    # intersection_list = list(intersection_set)
-    # print(intersection_list)
-    #     OUTPUT
-    #     [1, 3]
-
-    # Retrieve movie ids for movies that are genre with genre_name.
-    if genre_name:
-        genre_movie_ids = services.get_movie_ids_for_genre(genre_name, repo.repo_instance)
-        movie_ids = list(set.intersection(set(movie_ids), set(genre_movie_ids)))
-
-    # Retrieve movie ids for movies that are acted with actor_name.
-    if actor_name:
-        actor_movie_ids = services.get_movie_ids_for_actor(actor_name, repo.repo_instance)
-        movie_ids = list(set.intersection(set(movie_ids), set(actor_movie_ids)))
-
-    # Retrieve movie ids for movies that are directed with director_name.
-    if director_name:
-        director_movie_ids = services.get_movie_ids_for_director(director_name, repo.repo_instance)
-        movie_ids = list(set.intersection(set(movie_ids), set(director_movie_ids)))
-
-    movie_ids.sort()
-    # print(movie_ids)
+    with phase('filter'):
+        page = services.get_movie_ids_page(genre_name, actor_name, director_name, repo.repo_instance,
+                                           cursor=cursor, per_page=movies_per_page)
+    page_movie_ids = page.movie_ids
+
+    # The page only changes with the query, the catalog, the logged in user and comments on the page's movies, so
+    # a client holding the current version gets a 304 without the movies being fetched or the page being rendered.
+    number_of_comments, latest_comment_timestamp = services.get_comment_state(page_movie_ids, repo.repo_instance)
+    etag = make_etag(
+        'movies_by_genre', sorted(request.args.items(multi=True)),
+        services.get_catalog_version(repo.repo_instance), session.get('username'),
+        number_of_comments, latest_comment_timestamp
+    )
+    last_modified = last_modified_from(latest_comment_timestamp)
+    response = not_modified(etag, last_modified)
+    if response is not None:
+        return response
 
     # Retrieve the batch of movies to display on the Web page.
-    movies = services.get_movies_by_id(movie_ids[cursor:cursor + movies_per_page], repo.repo_instance)
+    with phase('movies'):
+        movies = services.get_movie_listings_by_id(page_movie_ids, repo.repo_instance)
+    tag_movies(page_movie_ids)
 
     first_article_url = None
     last_article_url = None
     next_article_url = None
     prev_article_url = None
 
-    if cursor > 0:
+    if page.has_previous:
         # There are preceding movies, so generate URLs for the 'previous' and 'first' navigation buttons.
         prev_article_url = url_for('movies_bp.movies_by_genre', genre=genre_name, actor=actor_name,
-                                   director=director_name, cursor=cursor - movies_per_page)
+                                   director=director_name, per_page=per_page,
+                                   cursor=services.encode_cursor('before', page_movie_ids[0]))
         first_article_url = url_for('movies_bp.movies_by_genre', genre=genre_name, actor=actor_name,
-                                    director=director_name)
+                                    director=director_name, per_page=per_page)
 
-    if cursor + movies_per_page < len(movie_ids):
+    if page.has_next:
         # There are further movies, so generate URLs for the 'next' and 'last' navigation buttons.
         next_article_url = url_for('movies_bp.movies_by_genre', genre=genre_name, actor=actor_name,
-                                   director=director_name, cursor=cursor + movies_per_page)
-
-        last_cursor = movies_per_page * int(len(movie_ids) / movies_per_page)
-        if len(movie_ids) % movies_per_page == 0:
-            last_cursor -= movies_per_page
+                                   director=director_name, per_page=per_page,
+                                   cursor=services.encode_cursor('after', page_movie_ids[-1]))
         last_article_url = url_for('movies_bp.movies_by_genre', genre=genre_name, actor=actor_name,
-                                   director=director_name, cursor=last_cursor)
+                                   director=director_name, per_page=per_page,
+                                   cursor=services.encode_cursor('before'))
 
     # Construct urls for viewing movie comments and adding comments.
     for movie in movies:
         movie['view_comment_url'] = url_for('movies_bp.movies_by_genre', genre=genre_name,
                                             actor=actor_name, director=director_name,
-                                            cursor=cursor,
+                                            cursor=cursor, per_page=per_page,
                                             view_comments_for=movie['id'])
         movie['add_comment_url'] = url_for('movies_bp.comment_on_movie', movie=movie['id'])
 
-    # Generate the webpage to display the articles.
-    return render_template(
-        'movies/movies.html',
-
-        movies=movies,
-
-        genre_name=genre_name,
-        actor_name=actor_name,
-        director_name=director_name,
-
-        genre_urls=utilities.get_genres_and_urls(),
-        actor_urls=utilities.get_actors_and_urls(),
-        director_urls=utilities.get_directors_and_urls(),
+    # Only one page of comments, for the movie whose comments are being viewed, is retrieved.
+    comments_page = None
+    more_comments_url = None
+    if movie_to_show_comments in page_movie_ids:
+        with phase('movies'):
+            comments_page = services.get_comments_page(movie_to_show_comments, comments_start,
+                                                       current_app.config['COMMENTS_PER_PAGE'], repo.repo_instance)
+        if comments_page['next_start'] is not None:
+            more_comments_url = url_for('movies_bp.movies_by_genre', genre=genre_name, actor=actor_name,
+                                        director=director_name, cursor=cursor, per_page=per_page,
+                                        view_comments_for=movie_to_show_comments,
+                                        comments_start=comments_page['next_start'])
+
+    with phase('filter'):
+        number_of_movies = services.get_number_of_search_results(genre_name, actor_name, director_name,
+                                                                 repo.repo_instance)
 
-        first_article_url=first_article_url,
-        last_article_url=last_article_url,
-        prev_article_url=prev_article_url,
-        next_article_url=next_article_url,
-
-        show_comments_for_movie=movie_to_show_comments
-    )
+    # Generate the webpage to display the articles.
+    with phase('render'):
+        page_html = render_template(
+            'movies/movies.html',
+
+            movies=movies,
+            number_of_movies=number_of_movies,
+
+            genre_name=genre_name,
+            actor_name=actor_name,
+            director_name=director_name,
+
+            genre_names=utilities.get_genre_names,
+            actor_names=utilities.get_actor_names,
+            director_names=utilities.get_director_names,
+
+            first_article_url=first_article_url,
+            last_article_url=last_article_url,
+            prev_article_url=prev_article_url,
+            next_article_url=next_article_url,
+
+            show_comments_for_movie=movie_to_show_comments,
+            comments_page=comments_page,
+            more_comments_url=more_comments_url
+        )
+    return set_validators(make_response(page_html), etag, last_modified)
+
+
+@movies_blueprint.route('/movies_by_genre/export', methods=['GET'])
+def export_movies_by_genre():
+    # Read query parameters; the filters are the same as for movies_by_genre.
+    genre_name = request.args.get('genre', '').strip()
+    actor_name = request.args.get('actor', '').strip()
+    director_name = request.args.get('director', '').strip()
+    export_format = request.args.get('format', 'csv')
+
+    if export_format not in export.EXPORT_MIMETYPES:
+        return Response(f'Unsupported export format: {export_format}', status=400, mimetype='text/plain')
+
+    fields = export.DEFAULT_EXPORT_FIELDS
+    if request.args.get('fields'):
+        try:
+            fields = api_services.parse_fields(request.args.get('fields'))
+        except api_services.UnknownFieldException as e:
+            return Response(f'Unknown fields: {e}', status=400, mimetype='text/plain')
+
+    # Movies are looked up and serialized batch by batch while the response is being sent.
+    batch_size = current_app.config['EXPORT_BATCH_SIZE']
+    movies = services.iter_search_results(genre_name, actor_name, director_name, repo.repo_instance,
+                                          batch_size=batch_size)
+    rows = export.export_rows(movies, fields, export_format, rows_per_chunk=batch_size)
+
+    response = Response(stream_with_context(rows), mimetype=export.EXPORT_MIMETYPES[export_format])
+    response.headers['Content-Disposition'] = f'attachment; filename=movies.{export_format}'
+    return response
 
 
 @movies_blueprint.route('/comment_on_movie', methods=['GET', 'POST'])
@@ -188,10 +230,27 @@ def comment_on_movie():
         # Extract the movie id of the movie being commented from the form.
         movie_id = int(form.movie_id.data)
 
+    # A GET for a page the client already holds gets a 304. Besides the movie's comments, the page embeds a CSRF token
+    # tied to the session, so the tag also varies with the token and changes before the token would expire.
+    etag = None
+    last_modified = None
+    if request.method == 'GET':
+        number_of_comments, latest_comment_timestamp = services.get_comment_state([movie_id], repo.repo_instance)
+        etag = make_etag(
+            'comment_on_movie', movie_id,
+            services.get_catalog_version(repo.repo_instance), username,
+            session.get('csrf_token'), csrf_token_window(),
+            number_of_comments, latest_comment_timestamp
+        )
+        last_modified = last_modified_from(latest_comment_timestamp)
+        response = not_modified(etag, last_modified)
+        if response is not None:
+            return response
+
     # For a GET or an unsuccessful POST, retrieve the movie to comment in dict form, and return a Web page that allows
     # the user to enter a comment. The generated Web page includes a form object.
-    movie = services.get_movie(movie_id, repo.repo_instance)
-    return render_template(
+    movie = services.get_movie_listing(movie_id, repo.repo_instance)
+    response = make_response(render_template(
         'movies/comment_on_movie.html',
         title='Comment movie',
         movie=movie,
@@ -203,10 +262,31 @@ def comment_on_movie():
         # tag_urls=utilities.get_tags_and_urls()
         tag_urls=list(),
 
-        genre_urls=utilities.get_genres_and_urls(),
-        actor_urls=utilities.get_actors_and_urls(),
-        director_urls=utilities.get_directors_and_urls(),
-    )
+        genre_names=utilities.get_genre_names,
+        actor_names=utilities.get_actor_names,
+        director_names=utilities.get_director_names,
+    ))
+    if etag is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def page_size(per_page):
+    # Clients may choose how many movies a page shows, up to MAX_MOVIES_PER_PAGE.
+    try:
+        movies_per_page = int(per_page)
+    except (TypeError, ValueError):
+        return current_app.config['MOVIES_PER_PAGE']
+    return min(max(movies_per_page, 1), current_app.config['MAX_MOVIES_PER_PAGE'])
+
+
+def csrf_token_window():
+    # CSRF tokens expire after WTF_CSRF_TIME_LIMIT seconds; a page revalidated within the same half-limit window
+    # never carries a token older than the limit.
+    time_limit = current_app.config.get('WTF_CSRF_TIME_LIMIT', 3600)
+    if not time_limit:
+        return None
+    return int(time.time() // max(time_limit // 2, 1))
 
 
 class ProfanityFree:
@@ -216,7 +296,7 @@ class ProfanityFree:
         self.message = message
 
     def __call__(self, form, field):
-        if profanity.contains_profanity(field.data):
+        if profanity.get_profanity_filter().contains_profanity(field.data):
             raise ValidationError(self.message)
 
 
@@ -0,0 +1,191 @@
+import threading
+from collections import deque
+
+from better_profanity import profanity
+from better_profanity.constants import ALLOWED_CHARACTERS
+from better_profanity.utils import get_complete_path_of_file, read_wordlist
+
+
+class ProfanityFilter:
+    """ Finds listed words, and their leetspeak variants, in text in a single pass over the text.
+
+    It follows better_profanity's contains_profanity(): a word matches a listed word, or one of its variants such as
+    'sh1t' and '$h*t', where each letter can be written with any of its CHARS_MAPPING substitutes. A run of up to
+    max_separators + 1 words matches too, either joined by exactly the separators of a listed phrase, e.g. 'deep
+    throat', or read with the separators dropped, e.g. 'f u c k'. Words are runs of ALLOWED_CHARACTERS and matches
+    must start and end on word boundaries. Unlike better_profanity, which ignores a one-character word at the very
+    end of the text, it also matches a spaced-out word there, e.g. 'you f u c k'.
+
+    Rather than storing every variant, the listed words are put in a trie, and each character of the text is treated
+    as the set of letters it can stand for. The trie, read this way, is a nondeterministic automaton that also
+    restarts at every word boundary. It's compiled up front into a deterministic one, a table with a row per state
+    and a column per class of characters, so checking a comment is one table lookup per character.
+    """
+
+    def __init__(self, words, chars_mapping: dict, max_separators: int = None, allowed_characters=ALLOWED_CHARACTERS):
+        self._allowed_characters = frozenset(allowed_characters)
+
+        # Trie of the listed words: a child dict per node, and the set of nodes that end a word.
+        self._children = [dict()]
+        self._terminals = set()
+        longest_run_of_separators = 0
+        for word in words:
+            word = word.lower()
+            node = 0
+            for char in word:
+                child = self._children[node].get(char)
+                if child is None:
+                    child = len(self._children)
+                    self._children.append(dict())
+                    self._children[node][char] = child
+                node = child
+            self._terminals.add(node)
+            longest_run_of_separators = max(longest_run_of_separators, self._count_separators(word))
+
+        # Like better_profanity, look at most as many words ahead as the listed word with the most separators has.
+        self.max_separators = longest_run_of_separators if max_separators is None else max_separators
+
+        # The letters each text character can stand for: itself, and any letter it's a substitute for.
+        letters_by_char = dict()
+        for letter in {char for children in self._children for char in children}:
+            letters_by_char.setdefault(letter, set()).add(letter)
+            for substitute in chars_mapping.get(letter, ()):
+                letters_by_char.setdefault(substitute, set()).add(letter)
+
+        # Characters standing for the same letters, and on the same side of a word boundary, share a column. Column 0
+        # is every other word character and column 1 every other separator.
+        columns = {(True, frozenset()): 0, (False, frozenset()): 1}
+        self._column_by_char = dict()
+        self._letters_by_column = [frozenset(), frozenset()]
+        self._separator_columns = {1}
+        for char, letters in letters_by_char.items():
+            in_word = char in self._allowed_characters
+            key = (in_word, frozenset(letters))
+            if key not in columns:
+                columns[key] = len(columns)
+                self._letters_by_column.append(key[1])
+                if not in_word:
+                    self._separator_columns.add(columns[key])
+            self._column_by_char[char] = columns[key]
+
+        self._number_of_columns = len(columns)
+
+        # The children each trie node moves to on each column.
+        columns_by_letter = dict()
+        for column, letters in enumerate(self._letters_by_column):
+            for letter in letters:
+                columns_by_letter.setdefault(letter, list()).append(column)
+        self._moves = [dict() for _ in self._children]
+        for node, children in enumerate(self._children):
+            for letter, child in children.items():
+                for column in columns_by_letter[letter]:
+                    self._moves[node].setdefault(column, list()).append(child)
+
+        self._compile()
+
+    def contains_profanity(self, text: str) -> bool:
+        column_by_char = self._column_by_char
+        allowed_characters = self._allowed_characters
+        table = self._table
+        number_of_columns = self._number_of_columns
+
+        state = self._start
+        for char in text.lower():
+            column = column_by_char.get(char)
+            if column is None:
+                column = 0 if char in allowed_characters else 1
+            state = table[state * number_of_columns + column]
+            if state < 0:
+                return True
+
+        return state in self._accepting
+
+    def _count_separators(self, word: str) -> int:
+        return sum(1 for char in word if char not in self._allowed_characters)
+
+    def _compile(self):
+        # An NFA state is a (trie node, mode, words left behind) triple. In 'phrase' mode separators are matched
+        # against the listed word; in 'joined' mode they're skipped. A DFA state is a set of NFA states, and whether
+        # the last character was part of a word.
+        start = (RESTART, False)
+        states = {start: 0}
+        pending = deque([start])
+        table = list()
+        accepting = set()
+
+        while pending:
+            nfa_states, in_word = pending.popleft()
+            row = list()
+            at_word_end = in_word and any(node in self._terminals for node, mode, words in nfa_states)
+            if at_word_end:
+                accepting.add(states[(nfa_states, in_word)])
+
+            for column in range(self._number_of_columns):
+                if column in self._separator_columns:
+                    if at_word_end:
+                        # A listed word has just been read and this separator ends it.
+                        row.append(-1)
+                        continue
+                    target = (self._read_separator(nfa_states, column, in_word), False)
+                else:
+                    target = (self._read_word_char(nfa_states, column), True)
+
+                state = states.get(target)
+                if state is None:
+                    state = states[target] = len(states)
+                    pending.append(target)
+                row.append(state)
+            table.extend(row)
+
+        self._table = table
+        self._start = 0
+        self._accepting = frozenset(accepting)
+        self.number_of_states = len(states)
+
+    def _read_word_char(self, nfa_states, column):
+        moves = self._moves
+        return frozenset(
+            (child, mode, words)
+            for node, mode, words in nfa_states
+            for child in moves[node].get(column, ())
+        )
+
+    def _read_separator(self, nfa_states, column, in_word):
+        # A match can start at the next word.
+        next_states = set(RESTART)
+        for node, mode, words in nfa_states:
+            if mode == 'joined':
+                # Words are counted as they're left, so a run of separators counts once. A listed phrase limits
+                # itself, so only joined words are counted.
+                if in_word:
+                    words += 1
+                if node != 0 and words <= self.max_separators:
+                    next_states.add((node, mode, words))
+            else:
+                next_states.update((child, mode, words) for child in self._moves[node].get(column, ()))
+
+        return frozenset(next_states)
+
+
+# The NFA states a match starts from: the root of the trie, in both modes.
+RESTART = frozenset({(0, 'phrase', 0), (0, 'joined', 0)})
+
+
+def default_profanity_filter() -> ProfanityFilter:
+    """ Builds a filter for better_profanity's word list and leetspeak substitutes. """
+    words = read_wordlist(get_complete_path_of_file('profanity_wordlist.txt'))
+    return ProfanityFilter(words, profanity.CHARS_MAPPING)
+
+
+_profanity_filter = None
+_profanity_filter_lock = threading.Lock()
+
+
+def get_profanity_filter() -> ProfanityFilter:
+    """ Returns the default filter, compiling it the first time it's asked for, and sharing it afterwards. """
+    global _profanity_filter
+    if _profanity_filter is None:
+        with _profanity_filter_lock:
+            if _profanity_filter is None:
+                _profanity_filter = default_profanity_filter()
+    return _profanity_filter
@@ -1,6 +1,10 @@
+import base64
+import binascii
+from bisect import bisect_left, bisect_right
 from typing import Iterable
 
 from movie.adapters.repository import AbstractRepository
+from movie.caching.lru import LRUCache
 from movie.domain.model import Movie, Genre, Actor, Director, Review
 from movie.domain.model import make_review
 
@@ -13,21 +17,33 @@ class UnknownUserException(Exception):
     pass
 
 
+# Callables notified with a Movie's id whenever add_comment stores a new comment for it.
+comment_added_listeners = list()
+
+# Number of search results, keyed by the search's names and the repository and catalog version they were counted for.
+search_result_counts = LRUCache(1024)
+
+
 def add_comment(movie_id: int, comment_text: str, username: str, repo: AbstractRepository):
-    # Check that the movie exists.
-    movie = repo.get_movie(movie_id)
-    if movie is None:
-        raise NonExistentMovieException
+    # Creating the comment also updates the Movie and the User, so the repository is held for the whole update.
+    with repo.writing():
+        # Check that the movie exists.
+        movie = repo.get_movie(movie_id)
+        if movie is None:
+            raise NonExistentMovieException
+
+        user = repo.get_user(username)
+        if user is None:
+            raise UnknownUserException
 
-    user = repo.get_user(username)
-    if user is None:
-        raise UnknownUserException
+        # Create comment.
+        comment = make_review(comment_text, user, movie)
 
-    # Create comment.
-    comment = make_review(comment_text, user, movie)
+        # Update the repository.
+        repo.add_review(comment)
 
-    # Update the repository.
-    repo.add_review(comment)
+    for listener in comment_added_listeners:
+        listener(movie_id)
 
 
 def get_movie(movie_id: int, repo: AbstractRepository):
@@ -39,6 +55,15 @@ def get_movie(movie_id: int, repo: AbstractRepository):
     return movie_to_dict(movie)
 
 
+def get_movie_listing(movie_id: int, repo: AbstractRepository):
+    movie = repo.get_movie(movie_id)
+
+    if movie is None:
+        raise NonExistentMovieException
+
+    return MovieListing(movie)
+
+
 def get_movie_ids_all(repo: AbstractRepository):
     movie_ids = repo.get_movie_ids_all()
 
@@ -63,6 +88,127 @@ def get_movie_ids_for_director(director_name, repo: AbstractRepository):
     return movie_ids
 
 
+class MovieIdPage:
+    def __init__(self, movie_ids, has_previous: bool, has_next: bool):
+        self.movie_ids = movie_ids
+        self.has_previous = has_previous
+        self.has_next = has_next
+
+
+def get_movie_ids_page(genre_name: str, actor_name: str, director_name: str, repo: AbstractRepository,
+                       cursor: str = None, per_page: int = 3):
+    """ Returns a MovieIdPage with up to per_page ids of Movies matching the search, in ascending id order.
+
+    Pages are addressed by keyset cursors rather than offsets: a cursor records the id the page starts after or
+    ends before, so a page costs a walk over roughly per_page index entries wherever it lies in the results.
+    """
+    direction, key = decode_cursor(cursor)
+    driver, others = _search_indexes(genre_name, actor_name, director_name, repo)
+
+    def matches(movie_id):
+        return all(_index_contains(index, movie_id) for index in others)
+
+    if direction == 'after':
+        start = 0 if key is None else bisect_right(driver, key)
+        movie_ids = _take(driver, range(start, len(driver)), matches, per_page + 1)
+        has_next = len(movie_ids) > per_page
+        movie_ids = movie_ids[:per_page]
+        has_previous = key is not None and bool(_take(driver, range(start - 1, -1, -1), matches, 1))
+    else:
+        end = len(driver) if key is None else bisect_left(driver, key)
+        movie_ids = _take(driver, range(end - 1, -1, -1), matches, per_page + 1)
+        has_previous = len(movie_ids) > per_page
+        movie_ids = movie_ids[:per_page][::-1]
+        has_next = key is not None and bool(_take(driver, range(end, len(driver)), matches, 1))
+
+    return MovieIdPage(movie_ids, has_previous, has_next)
+
+
+def iter_search_results(genre_name: str, actor_name: str, director_name: str, repo: AbstractRepository,
+                        batch_size: int = 100):
+    """ Yields every Movie matching the search, in ascending id order.
+
+    Movies are fetched a keyset page of batch_size at a time, so memory use doesn't grow with the number of results.
+    """
+    cursor = None
+    while True:
+        page = get_movie_ids_page(genre_name, actor_name, director_name, repo, cursor=cursor, per_page=batch_size)
+        yield from repo.get_movies_by_id(page.movie_ids)
+
+        if not page.has_next:
+            return
+        cursor = encode_cursor('after', page.movie_ids[-1])
+
+
+def get_number_of_search_results(genre_name: str, actor_name: str, director_name: str, repo: AbstractRepository):
+    key = (genre_name, actor_name, director_name, id(repo), repo.get_catalog_version())
+    number_of_results = search_result_counts.get(key)
+
+    if number_of_results is None:
+        driver, others = _search_indexes(genre_name, actor_name, director_name, repo)
+        if others:
+            number_of_results = sum(
+                1 for movie_id in driver if all(_index_contains(index, movie_id) for index in others)
+            )
+        else:
+            number_of_results = len(driver)
+        search_result_counts.set(key, number_of_results)
+
+    return number_of_results
+
+
+def encode_cursor(direction: str, movie_id: int = None):
+    """ Returns an opaque cursor for the page after or before the Movie with movie_id.
+
+    A 'before' cursor without a movie id addresses the last page.
+    """
+    token = f'{direction[0]}:{"" if movie_id is None else movie_id}'
+    return base64.urlsafe_b64encode(token.encode('ascii')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    """ Returns the direction and movie id encoded by cursor. Missing or malformed cursors address the first page. """
+    if not cursor:
+        return 'after', None
+
+    try:
+        token = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii')
+        direction, movie_id = token.split(':')
+        direction = {'a': 'after', 'b': 'before'}[direction]
+        return direction, int(movie_id) if movie_id else None
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError):
+        return 'after', None
+
+
+def _search_indexes(genre_name: str, actor_name: str, director_name: str, repo: AbstractRepository):
+    # Returns the shortest sorted id index to walk, and the other indexes that its ids must also be in.
+    indexes = [
+        repo.get_movie_id_index(facet, name)
+        for facet, name in (('genre', genre_name), ('actor', actor_name), ('director', director_name)) if name
+    ]
+    if not indexes:
+        indexes = [repo.get_movie_id_index()]
+
+    indexes.sort(key=len)
+    return indexes[0], indexes[1:]
+
+
+def _index_contains(index, movie_id: int) -> bool:
+    position = bisect_left(index, movie_id)
+    return position < len(index) and index[position] == movie_id
+
+
+def _take(index, positions, matches, limit: int):
+    movie_ids = list()
+    for position in positions:
+        if len(movie_ids) == limit:
+            break
+        movie_id = index[position]
+        if matches(movie_id):
+            movie_ids.append(movie_id)
+    return movie_ids
+
+
 def get_movies_by_id(id_list, repo: AbstractRepository):
     movies = repo.get_movies_by_id(id_list)
 
@@ -72,6 +218,59 @@ def get_movies_by_id(id_list, repo: AbstractRepository):
     return movies_as_dict
 
 
+def get_movie_listings_by_id(id_list, repo: AbstractRepository):
+    movies = repo.get_movies_by_id(id_list)
+
+    return [MovieListing(movie) for movie in movies]
+
+
+def get_catalog_version(repo: AbstractRepository):
+    return repo.get_catalog_version()
+
+
+def get_comment_state(id_list, repo: AbstractRepository):
+    """ Returns the number of comments and the latest comment timestamp across the Movies with ids in id_list.
+
+    Only the Movies' comment counters are read, so this is cheap enough to call before deciding to render a page.
+    """
+    number_of_comments = 0
+    latest_timestamp = None
+
+    for movie_id in id_list:
+        movie = repo.get_movie(movie_id)
+        if movie is None:
+            continue
+        number_of_comments += movie.number_of_comments
+        timestamp = movie.latest_comment_timestamp
+        if timestamp is not None and (latest_timestamp is None or timestamp > latest_timestamp):
+            latest_timestamp = timestamp
+
+    return number_of_comments, latest_timestamp
+
+
+def get_comments_page(movie_id: int, start: int, limit: int, repo: AbstractRepository, serialize=None):
+    """ Returns a dict with up to limit of the Movie's comments, ordered by timestamp from the start-th comment, the
+    Movie's number of comments, and the start of the next page, or None if this is the last page.
+
+    The comments are converted with serialize, comments_to_dict by default.
+    """
+    serialize = serialize or comments_to_dict
+    movie = repo.get_movie(movie_id)
+
+    if movie is None:
+        raise NonExistentMovieException
+
+    start = max(start, 0)
+    comments = repo.get_reviews_for_movie(movie_id, start, limit)
+    number_of_comments = movie.number_of_comments
+
+    return {
+        'comments': serialize(comments),
+        'number_of_comments': number_of_comments,
+        'next_start': start + limit if start + limit < number_of_comments else None
+    }
+
+
 def get_comments_for_movie(movie_id, repo: AbstractRepository):
     movie = repo.get_movie(movie_id)
 
@@ -81,6 +280,90 @@ def get_comments_for_movie(movie_id, repo: AbstractRepository):
     return comments_to_dict(movie.comments)
 
 
+# ============================================
+# Views of model entities for Web pages
+# ============================================
+
+class MovieListing:
+    """ A read-only view of a Movie for Web pages.
+
+    Unlike movie_to_dict, nothing is converted up front: each attribute is read from the Movie when a template uses
+    it, related genres, actors and directors are emitted by name only, and comments are only converted if the page
+    shows them. Item access is supported so that views can attach page-specific URLs, e.g. listing['add_comment_url'].
+    """
+
+    def __init__(self, movie: Movie):
+        self._movie = movie
+        self._urls = dict()
+
+    @property
+    def id(self) -> int:
+        return self._movie.id
+
+    @property
+    def title(self) -> str:
+        return self._movie.title
+
+    @property
+    def description(self) -> str:
+        return self._movie.description
+
+    @property
+    def year(self) -> int:
+        return self._movie.year
+
+    @property
+    def runtime_minutes(self) -> int:
+        return self._movie.runtime_minutes
+
+    @property
+    def rating(self) -> float:
+        return self._movie.rating
+
+    @property
+    def votes(self) -> int:
+        return self._movie.votes
+
+    @property
+    def revenue_millions(self) -> float:
+        return self._movie.revenue_millions
+
+    @property
+    def meta_score(self) -> int:
+        return self._movie.meta_score
+
+    @property
+    def genres(self):
+        return [{'name': genre.genre_name} for genre in self._movie.genres]
+
+    @property
+    def actors(self):
+        return [{'name': actor.actor_name} for actor in self._movie.actors]
+
+    @property
+    def directors(self):
+        return [{'name': director.director_name} for director in self._movie.directors]
+
+    @property
+    def number_of_comments(self) -> int:
+        return self._movie.number_of_comments
+
+    @property
+    def comments(self):
+        return comments_to_dict(self._movie.comments)
+
+    def __getitem__(self, key):
+        if key in self._urls:
+            return self._urls[key]
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        self._urls[key] = value
+
+
 # ============================================
 # Functions to convert model entities to dicts
 # ============================================
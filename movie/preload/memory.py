@@ -0,0 +1,69 @@
+import os
+
+import click
+
+
+def parse_smaps_rollup(text: str) -> dict:
+    """ Returns the memory totals, in kB, of a /proc/<pid>/smaps_rollup file. """
+    fields = dict()
+    for line in text.splitlines():
+        name, _, value = line.partition(':')
+        value = value.split()
+        if len(value) == 2 and value[1] == 'kB':
+            fields[name] = int(value[0])
+
+    return {
+        'rss_kb': fields.get('Rss', 0),
+        'pss_kb': fields.get('Pss', 0),
+        'shared_kb': fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0),
+        'private_kb': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    }
+
+
+def process_memory(pid: int) -> dict:
+    with open(f'/proc/{pid}/smaps_rollup') as smaps_rollup:
+        memory = parse_smaps_rollup(smaps_rollup.read())
+    memory['pid'] = pid
+    return memory
+
+
+def child_pids(pid: int):
+    children = list()
+    for task in os.listdir(f'/proc/{pid}/task'):
+        with open(f'/proc/{pid}/task/{task}/children') as task_children:
+            children.extend(int(child) for child in task_children.read().split())
+    return sorted(children)
+
+
+def worker_memory_report(master_pid: int) -> list:
+    """ Returns the memory of the master process and each of its workers, in kB.
+
+    Shared is memory whose pages are also mapped by another process, e.g. a catalog the master populated before
+    forking; private is memory only the process maps. Pss divides each shared page between the processes sharing it,
+    so the Pss of the master and workers adds up to the memory they use together.
+    """
+    report = [process_memory(master_pid)]
+    for pid in child_pids(master_pid):
+        try:
+            report.append(process_memory(pid))
+        except FileNotFoundError:
+            # The worker exited while the report was being made.
+            pass
+    return report
+
+
+@click.command('worker-memory')
+@click.argument('master_pid', type=int)
+def worker_memory_command(master_pid):
+    """ Reports shared and private memory of a pre-forking server's master process and its workers. Linux only. """
+    report = worker_memory_report(master_pid)
+
+    click.echo(f'{"pid":>8} {"rss kB":>10} {"pss kB":>10} {"shared kB":>10} {"private kB":>10}')
+    for memory in report:
+        click.echo(f'{memory["pid"]:>8} {memory["rss_kb"]:>10} {memory["pss_kb"]:>10} '
+                   f'{memory["shared_kb"]:>10} {memory["private_kb"]:>10}')
+    click.echo(f'{"total":>8} {sum(m["rss_kb"] for m in report):>10} {sum(m["pss_kb"] for m in report):>10}')
+
+
+if __name__ == '__main__':
+    worker_memory_command()
@@ -0,0 +1,30 @@
+import gc
+
+from movie.adapters.memory_repository import MemoryRepository
+from movie.movies.profanity import get_profanity_filter
+
+
+def freeze_for_fork(repo: MemoryRepository) -> int:
+    """ Prepares a populated repository to be shared copy-on-write by forked workers, e.g. with 'gunicorn --preload'.
+
+    The repository's lazily built indexes, and the comment profanity filter, are built now, so workers don't each
+    build, and write, their own copy on their first requests. Then every object tracked by the garbage collector is
+    moved to its permanent generation: collections in the workers never visit those objects, so they don't write to,
+    and copy, the pages holding the catalog. Reference counts still change as requests read the catalog, so some
+    pages are copied regardless.
+
+    Returns the number of objects frozen.
+    """
+    repo.build_movie_id_indexes()
+    get_profanity_filter()
+
+    # Garbage is collected first, so that it's freed once here rather than frozen into every worker.
+    gc.collect()
+    gc.freeze()
+    return gc.get_freeze_count()
+
+
+def init_preload(app, repo: MemoryRepository):
+    # Called once the app is fully built, so that compiled templates are frozen along with the catalog.
+    if app.config['PRELOAD_FREEZE']:
+        freeze_for_fork(repo)
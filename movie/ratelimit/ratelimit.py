@@ -0,0 +1,123 @@
+import abc
+import threading
+import time
+
+from flask import current_app, g, request, session
+
+from movie.caching.lru import LRUCache
+
+
+class AbstractBucketStore(abc.ABC):
+
+    @abc.abstractmethod
+    def take(self, key, rate: float, burst: int) -> float:
+        """ Takes a token from the bucket named key, which holds up to burst tokens and refills at rate tokens a
+        second. A new bucket starts full.
+
+        Returns 0 if a token was taken, or else the number of seconds until one will be available.
+        """
+        raise NotImplementedError
+
+
+class MemoryBucketStore(AbstractBucketStore):
+    """ Keeps token buckets in this process, for up to maxsize clients. A bucket pushed out by newer clients starts
+    full again if its client comes back.
+
+    Each worker process keeps its own buckets, so with N workers a client can get up to N times its budget. A store
+    shared by the workers, e.g. one kept in shared memory or a network cache, can implement AbstractBucketStore and be
+    set as RATE_LIMIT_STORE in the config passed to create_app instead.
+    """
+
+    def __init__(self, maxsize: int = 10000, clock=time.monotonic):
+        self._buckets = LRUCache(maxsize)
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def take(self, key, rate: float, burst: int) -> float:
+        with self._lock:
+            now = self._clock()
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+
+            if tokens >= 1:
+                self._buckets.set(key, (tokens - 1, now))
+                return 0.0
+
+            self._buckets.set(key, (tokens, now))
+            return (1 - tokens) / rate if rate > 0 else float('inf')
+
+
+class RateLimiter:
+    """ Admission control for expensive endpoints.
+
+    Each endpoint in budgets has a token bucket per client IP address and, for logged in users, per username. A
+    request is refused with 429 when either is empty. A budget keyed by (method, endpoint) rather than by endpoint
+    only applies to requests with that method, e.g. POSTs of the login form but not GETs of it. Each endpoint in concurrency_limits can have at most that many
+    requests in progress across the process; a request over the limit is refused with 503 straight away rather than
+    waiting for a thread.
+    """
+
+    def __init__(self, budgets: dict = None, concurrency_limits: dict = None, store: AbstractBucketStore = None):
+        # Endpoint, or (method, endpoint), -> (tokens a second, burst).
+        self._budgets = dict(budgets or {})
+        self._store = store if store is not None else MemoryBucketStore()
+        self._slots = {
+            endpoint: threading.BoundedSemaphore(limit) for endpoint, limit in (concurrency_limits or {}).items()
+        }
+
+        self.limited = 0
+        self.shed = 0
+
+    def init_app(self, app):
+        app.extensions['rate_limiter'] = self
+        app.before_request(self._admit)
+        app.teardown_request(self._release)
+
+    def stats(self) -> dict:
+        return {'limited': self.limited, 'shed': self.shed}
+
+    def _admit(self):
+        endpoint = request.endpoint
+        budget_key = (request.method, endpoint)
+        budget = self._budgets.get(budget_key)
+        if budget is None:
+            budget_key = endpoint
+            budget = self._budgets.get(endpoint)
+        if budget is not None:
+            rate, burst = budget
+            keys = [(budget_key, 'ip', request.remote_addr)]
+            if session.get('username') is not None:
+                keys.append((budget_key, 'user', session['username']))
+
+            retry_after = max(self._store.take(key, rate, burst) for key in keys)
+            if retry_after > 0:
+                self.limited += 1
+                return refusal(429, 'Too many requests, please slow down.', retry_after)
+
+        slots = self._slots.get(endpoint)
+        if slots is not None:
+            if not slots.acquire(blocking=False):
+                self.shed += 1
+                return refusal(503, 'The server is busy, please try again shortly.', 1)
+            g.rate_limiter_slots = slots
+
+        return None
+
+    def _release(self, exc):
+        slots = g.pop('rate_limiter_slots', None)
+        if slots is not None:
+            slots.release()
+
+
+def refusal(status: int, message: str, retry_after: float):
+    response = current_app.response_class(message, status=status, mimetype='text/plain')
+    # Retry-After is a whole number of seconds; round up so clients don't come back too soon.
+    response.headers['Retry-After'] = str(max(1, int(retry_after + 0.999)))
+    return response
+
+
+def init_rate_limiting(app, store: AbstractBucketStore = None):
+    if not app.config['RATE_LIMIT_ENABLED']:
+        return
+    store = store if store is not None else app.config['RATE_LIMIT_STORE']
+    RateLimiter(app.config['RATE_LIMITS'], app.config['CONCURRENCY_LIMITS'], store).init_app(app)
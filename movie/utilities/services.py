@@ -23,3 +23,7 @@ def get_director_names(repo: AbstractRepository):
     director_names = [director.director_name for director in directors]
 
     return director_names
+
+
+def get_catalog_version(repo: AbstractRepository):
+    return repo.get_catalog_version()
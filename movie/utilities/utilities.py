@@ -1,7 +1,8 @@
-from flask import Blueprint, request, render_template, redirect, url_for, session
+from flask import Blueprint, request, render_template, redirect, session
 
 import movie.adapters.repository as repo
 import movie.utilities.services as services
+from movie.diagnostics.timing import phase
 
 
 # Configure Blueprint.
@@ -9,28 +10,24 @@ utilities_blueprint = Blueprint(
     'utilities_bp', __name__)
 
 
-def get_genres_and_urls():
-    genre_names = services.get_genre_names(repo.repo_instance)
-    genre_urls = dict()
-    for genre_name in genre_names:
-        genre_urls[genre_name] = url_for('movies_bp.movies_by_genre', genre=genre_name)
+@utilities_blueprint.app_context_processor
+def inject_catalog_version():
+    # Cached template fragments that depend on the catalog are keyed by its version.
+    return dict(catalog_version=services.get_catalog_version(repo.repo_instance))
 
-    return genre_urls
 
+# The sidebar's option lists are passed to templates uncalled, and only called inside its {% cache %} body, so a
+# cached sidebar doesn't list the catalog at all.
+def get_genre_names():
+    with phase('sidebar'):
+        return services.get_genre_names(repo.repo_instance)
 
-def get_actors_and_urls():
-    actor_names = services.get_actor_names(repo.repo_instance)
-    actor_urls = dict()
-    for actor_name in actor_names:
-        actor_urls[actor_name] = url_for('movies_bp.movies_by_genre', actor=actor_name)
 
-    return actor_urls
+def get_actor_names():
+    with phase('sidebar'):
+        return services.get_actor_names(repo.repo_instance)
 
 
-def get_directors_and_urls():
-    director_names = services.get_director_names(repo.repo_instance)
-    director_urls = dict()
-    for director_name in director_names:
-        director_urls[director_name] = url_for('movies_bp.movies_by_genre', director=director_name)
-
-    return director_urls
+def get_director_names():
+    with phase('sidebar'):
+        return services.get_director_names(repo.repo_instance)
@@ -4,6 +4,8 @@ import pytest
 from movie import create_app
 from movie.adapters import memory_repository
 from movie.adapters.memory_repository import MemoryRepository
+from movie.adapters.loader import CatalogLoader
+from movie.asgi.asgi import create_asgi_app
 # /Users/huiyuancao/Desktop/flask-movie/tests/data
 path = "/Users/huiyuancao/Desktop/"
 TEST_DATA_PATH = os.path.join(path, 'flask-movie/tests/data/')
@@ -14,6 +16,21 @@ TEST_DATA_PATH = os.path.join(path, 'flask-movie/tests/data/')
 
 
 
+class FakeClock:
+    """ A clock for timers that only moves when a test moves it, by adding to now. """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
 @pytest.fixture
 def in_memory_repo():
     repo = MemoryRepository()
@@ -21,6 +38,16 @@ def in_memory_repo():
     return repo
 
 
+@pytest.fixture
+def data_path():
+    return TEST_DATA_PATH
+
+
+@pytest.fixture
+def catalog_loader():
+    return CatalogLoader(TEST_DATA_PATH, MemoryRepository())
+
+
 @pytest.fixture
 def client():
     my_app = create_app({
@@ -32,6 +59,46 @@ def client():
     return my_app.test_client()
 
 
+@pytest.fixture
+def timed_client():
+    my_app = create_app({
+        'TESTING': True,
+        'TEST_DATA_PATH': TEST_DATA_PATH,
+        'WTF_CSRF_ENABLED': False,
+        'SERVER_TIMING_ENABLED': True
+    })
+
+    return my_app.test_client()
+
+
+ADMIN_TOKEN = 'test-admin-token'
+
+
+@pytest.fixture
+def admin_client(tmp_path):
+    my_app = create_app({
+        'TESTING': True,
+        'TEST_DATA_PATH': TEST_DATA_PATH,
+        'WTF_CSRF_ENABLED': False,
+        'ADMIN_USERNAMES': ['thorke'],
+        'ADMIN_TOKEN': ADMIN_TOKEN,
+        'PROFILING_ENABLED': True,
+        'PROFILE_DIR': str(tmp_path / 'profiles')
+    })
+
+    return my_app.test_client()
+
+
+@pytest.fixture
+def asgi_app():
+    return create_asgi_app({
+        'TESTING': True,
+        'TEST_DATA_PATH': TEST_DATA_PATH,
+        'WTF_CSRF_ENABLED': False,
+        'ASGI_WORKER_THREADS': 2
+    })
+
+
 class AuthenticationManager:
     def __init__(self, client):
         self._client = client
@@ -1,3 +1,6 @@
+import gzip
+import os
+
 import pytest
 
 from flask import session
@@ -144,3 +147,302 @@ def test_articles_with_tag(client):
     assert b'Articles tagged by Health' in response.data
     assert b'Coronavirus: First case of virus in New Zealand' in response.data
     assert b'Covid 19 coronavirus: US deaths double in two days, Trump says quarantine not necessary' in response.data
+
+
+def test_movies_page_is_not_modified_for_matching_etag(client):
+    response = client.get('/movies_by_genre?genre=Sci-Fi')
+    etag = response.headers['ETag']
+    assert response.status_code == 200
+
+    # A client holding the current version of the page doesn't receive it again.
+    response = client.get('/movies_by_genre?genre=Sci-Fi', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+    # Other query parameters produce a different page.
+    response = client.get('/movies_by_genre?genre=Horror', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+
+
+def test_if_modified_since_alone_does_not_match_a_page_with_an_etag(client, auth):
+    # The page changes when the client logs in, though no comment has been added since.
+    last_modified = client.get('/movies_by_genre?genre=Sci-Fi').headers['Last-Modified']
+    auth.login()
+    response = client.get('/movies_by_genre?genre=Sci-Fi', headers={'If-Modified-Since': last_modified})
+    assert response.status_code == 200
+
+    # The same goes for a page replayed from the response cache.
+    client.get('/authentication/logout')
+    response = client.get('/movies_by_genre?genre=Sci-Fi', headers={'If-Modified-Since': last_modified})
+    assert response.headers['X-Cache'] == 'HIT'
+    assert response.status_code == 200
+
+
+def test_movies_page_etag_changes_when_a_comment_is_added(client, auth):
+    auth.login()
+    etag = client.get('/movies_by_genre').headers['ETag']
+
+    client.post('/comment_on_movie', data={'comment': 'Great fun from start to finish', 'movie_id': 1})
+
+    response = client.get('/movies_by_genre', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_movies_page_is_served_from_response_cache(client):
+    assert client.get('/movies_by_genre?genre=Sci-Fi').headers['X-Cache'] == 'MISS'
+
+    response = client.get('/movies_by_genre?genre=Sci-Fi')
+    assert response.status_code == 200
+    assert response.headers['X-Cache'] == 'HIT'
+    assert b'Guardians of the Galaxy' in response.data
+
+
+def test_response_cache_drops_pages_showing_a_commented_movie(client, auth):
+    auth.login()
+    client.get('/movies_by_genre')
+    assert client.get('/movies_by_genre').headers['X-Cache'] == 'HIT'
+
+    client.post('/comment_on_movie', data={'comment': 'Great fun from start to finish', 'movie_id': 1})
+
+    response = client.get('/movies_by_genre?view_comments_for=1')
+    assert b'Great fun from start to finish' in response.data
+    assert client.get('/movies_by_genre').headers['X-Cache'] == 'MISS'
+
+
+def test_api_movies_with_field_projection(client):
+    response = client.get('/api/movies?genre=Sci-Fi&fields=id,title')
+    assert response.status_code == 200
+
+    assert response.get_json()['movies'] == [
+        {'id': 1, 'title': 'Guardians of the Galaxy'},
+        {'id': 2, 'title': 'Prometheus'}
+    ]
+
+
+def test_api_movies_rejects_unknown_fields(client):
+    response = client.get('/api/movies?fields=id,budget')
+    assert response.status_code == 400
+    assert 'budget' in response.get_json()['error']
+
+
+def test_export_streams_search_results_as_ndjson(client):
+    response = client.get('/movies_by_genre/export?genre=Sci-Fi&format=ndjson&fields=id,number_of_comments')
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.data.splitlines() == [b'{"id": 1, "number_of_comments": 3}', b'{"id": 2, "number_of_comments": 0}']
+
+
+def test_pages_are_gzipped_for_clients_that_accept_it(client):
+    response = client.get('/movies_by_genre', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert b'Guardians of the Galaxy' in gzip.decompress(response.data)
+
+    response = client.get('/movies_by_genre')
+    assert 'Content-Encoding' not in response.headers
+    assert b'Guardians of the Galaxy' in response.data
+
+
+def test_static_gzip_variant_without_its_file_is_not_found(client, tmp_path):
+    (tmp_path / 'removed.css.gz').write_bytes(gzip.compress(b'body {}'))
+    client.application.static_folder = str(tmp_path)
+
+    response = client.get('/static/removed.css', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 404
+
+
+def test_api_batch_get_movies(client):
+    response = client.post('/api/movies:batchGet', json={'ids': [2, 99, 1], 'fields': ['id', 'directors']})
+    assert response.status_code == 200
+
+    assert response.get_json() == {
+        'movies': [{'id': 2, 'directors': ['Ridley Scott']}, {'id': 1, 'directors': ['James Gunn']}],
+        'missing_ids': [99]
+    }
+
+
+def test_api_batch_get_movies_rejects_fields_that_are_not_strings(client):
+    for fields in (5, {'id': True}, ['id', 5]):
+        response = client.post('/api/movies:batchGet', json={'ids': [1], 'fields': fields})
+        assert response.status_code == 400
+
+
+def test_api_movie_comments_are_paginated(client):
+    response = client.get('/api/movies/1/comments?start=1&limit=1')
+    assert response.status_code == 200
+
+    comments_page = response.get_json()
+    assert comments_page['comments'] == [
+        {'username': 'thorke', 'comment_text': 'Yeah great', 'timestamp': '2020-02-28T14:39:51'}
+    ]
+    assert comments_page['next_start'] == 2
+
+
+def test_health_endpoints(client):
+    assert client.get('/healthz').status_code == 200
+
+    response = client.get('/readyz')
+    assert response.status_code == 200
+    assert response.get_json()['state'] == 'ready'
+
+
+def test_catalog_routes_answer_503_until_ready(client):
+    loader = client.application.extensions['catalog_loader']
+    loader._ready.clear()
+
+    response = client.get('/movies_by_genre')
+    assert response.status_code == 503
+    assert 'Retry-After' in response.headers
+    assert client.get('/healthz').status_code == 200
+    assert client.get('/readyz').status_code == 503
+
+
+def test_login_hashes_on_the_kdf_pool(client, auth):
+    kdf_pool = client.application.extensions['kdf_pool']
+
+    auth.login()
+
+    assert kdf_pool.stats()['completed'] == 1
+
+
+def test_login_answers_503_when_the_kdf_pool_is_full(client, auth):
+    kdf_pool = client.application.extensions['kdf_pool']
+    kdf_pool.max_workers = kdf_pool.max_queue = 0
+
+    response = auth.login()
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert kdf_pool.stats()['rejected'] == 1
+
+
+def test_rate_limited_clients_get_429(client):
+    rate_limiter = client.application.extensions['rate_limiter']
+    rate_limiter._budgets['movies_bp.movies_by_genre'] = (0.5, 2)
+
+    assert client.get('/movies_by_genre?genre=Action').status_code == 200
+    assert client.get('/movies_by_genre?genre=Sci-Fi').status_code == 200
+
+    response = client.get('/movies_by_genre?genre=Drama')
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '2'
+
+    # Routes without a budget aren't limited.
+    assert client.get('/').status_code == 200
+
+
+def test_login_budget_only_counts_login_attempts(client):
+    rate_limiter = client.application.extensions['rate_limiter']
+    rate_limiter._budgets[('POST', 'authentication_bp.login')] = (0.01, 1)
+
+    for _ in range(3):
+        assert client.get('/authentication/login').status_code == 200
+
+    client.post('/authentication/login', data={'username': 'thorke', 'password': 'wrong'})
+    response = client.post('/authentication/login', data={'username': 'thorke', 'password': 'wrong'})
+    assert response.status_code == 429
+
+
+def test_requests_over_the_concurrency_limit_get_503(client):
+    rate_limiter = client.application.extensions['rate_limiter']
+    slots = rate_limiter._slots['movies_bp.movies_by_genre']
+    while slots.acquire(blocking=False):
+        pass
+
+    response = client.get('/movies_by_genre?genre=Action')
+    assert response.status_code == 503
+    assert rate_limiter.stats()['shed'] == 1
+
+    slots.release()
+    assert client.get('/movies_by_genre?genre=Action').status_code == 200
+
+
+def test_server_timing_reports_the_phases_of_a_movies_page(timed_client):
+    response = timed_client.get('/movies_by_genre?genre=Action')
+    assert response.status_code == 200
+
+    phases = [metric.split(';')[0] for metric in response.headers['Server-Timing'].split(', ')]
+    assert phases == ['filter', 'movies', 'sidebar', 'render', 'total']
+
+
+def test_server_timing_has_no_sidebar_phase_once_the_sidebar_is_cached(timed_client):
+    timed_client.get('/movies_by_genre?genre=Action')
+    # Another page of the same search, so the response isn't cached but its sidebar is.
+    response = timed_client.get('/movies_by_genre?genre=Action&per_page=2')
+
+    phases = [metric.split(';')[0] for metric in response.headers['Server-Timing'].split(', ')]
+    assert phases == ['filter', 'movies', 'render', 'total']
+
+
+def test_server_timing_is_off_by_default(client):
+    assert 'Server-Timing' not in client.get('/movies_by_genre?genre=Action').headers
+
+
+def test_metrics_count_requests_and_repository_operations(client):
+    client.get('/movies_by_genre?genre=Action')
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    text = response.get_data(as_text=True)
+    assert ('http_requests_total{blueprint="movies_bp",endpoint="movies_bp.movies_by_genre",method="GET",'
+            'status="200"} 1') in text
+    assert 'movie_repository_operation_duration_seconds_count{operation="get_movies_by_id"} 1' in text
+    assert 'movie_catalog_size{collection="movies"} 5' in text
+
+
+def test_admin_can_profile_a_request(admin_client):
+    response = admin_client.get('/movies_by_genre?genre=Action&profile=1',
+                                headers={'X-Admin-Token': 'test-admin-token'})
+    assert response.status_code == 200
+
+    profile_dir = admin_client.application.config['PROFILE_DIR']
+    name = response.headers['X-Profile']
+    assert os.path.exists(os.path.join(profile_dir, name + '.prof'))
+    with open(os.path.join(profile_dir, name + '.txt')) as summary:
+        assert 'movies_by_genre' in summary.read()
+
+
+def test_only_admins_can_profile_requests(admin_client):
+    response = admin_client.get('/movies_by_genre?genre=Action&profile=1', headers={'X-Admin-Token': 'wrong'})
+    assert 'X-Profile' not in response.headers
+
+    # A user named in ADMIN_USERNAMES is an administrator once logged in.
+    admin_client.post('authentication/login', data={'username': 'thorke', 'password': 'cLQ^C#oFXloS'})
+    response = admin_client.get('/movies_by_genre?genre=Sci-Fi', headers={'X-Profile': '1'})
+    assert 'X-Profile' in response.headers
+
+
+def test_profile_parameter_can_be_turned_off(admin_client):
+    for value in ('0', 'false', 'False', ''):
+        response = admin_client.get(f'/movies_by_genre?genre=Action&profile={value}',
+                                    headers={'X-Admin-Token': 'test-admin-token'})
+        assert response.status_code == 200
+        assert 'X-Profile' not in response.headers
+
+
+def test_one_request_is_profiled_at_a_time(admin_client):
+    profiler = admin_client.application.extensions['profiler']
+    profiler._lock.acquire()
+
+    response = admin_client.get('/?profile=1', headers={'X-Admin-Token': 'test-admin-token'})
+    assert response.status_code == 200
+    assert response.headers['X-Profile'] == 'busy'
+
+
+def test_admin_memory_report(admin_client):
+    assert admin_client.get('/admin/memory').status_code == 404
+
+    response = admin_client.get('/admin/memory', headers={'X-Admin-Token': 'test-admin-token'})
+    assert response.status_code == 200
+    assert response.json['repository']['categories']['movies']['objects'] > 0
+
+
+def test_admin_startup_report(admin_client):
+    assert admin_client.get('/admin/startup').status_code == 404
+
+    response = admin_client.get('/admin/startup', headers={'X-Admin-Token': 'test-admin-token'})
+    assert response.status_code == 200
+    phases = [phase['name'] for phase in response.json['phases']]
+    assert phases[:3] == ['config', 'request_hooks', 'populate']
+    assert {'populate.movies', 'populate.users', 'populate.comments', 'blueprints'} <= set(phases)
+    assert response.json['catalog']['state'] == 'ready'
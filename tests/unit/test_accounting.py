@@ -0,0 +1,36 @@
+import tracemalloc
+
+from movie.diagnostics.accounting import CATEGORIES, MemoryAccount, repository_memory, trace_populate
+
+
+def test_repository_memory_counts_every_category(in_memory_repo):
+    report = repository_memory(in_memory_repo)
+
+    assert list(report['categories']) == list(CATEGORIES)
+    for category, values in report['categories'].items():
+        assert values['bytes'] > 0, category
+    assert report['total_bytes'] == sum(values['bytes'] for values in report['categories'].values())
+    # There's one description for each movie.
+    assert report['categories']['descriptions']['objects'] == in_memory_repo.get_number_of_movies()
+
+
+def test_repository_memory_walks_the_repository_without_holding_its_lock(in_memory_repo, monkeypatch):
+    add = MemoryAccount.add
+
+    def add_unlocked(account, category, obj, extra_bytes=0):
+        assert in_memory_repo._lock._readers == 0
+        add(account, category, obj, extra_bytes)
+
+    monkeypatch.setattr(MemoryAccount, 'add', add_unlocked)
+    assert repository_memory(in_memory_repo)['total_bytes'] > 0
+
+
+def test_trace_populate_reports_allocations_by_line(data_path):
+    repo, report, snapshot = trace_populate(data_path, top=5)
+
+    assert repo.get_number_of_movies() > 0
+    assert report['retained_bytes'] > 0
+    assert report['peak_bytes'] >= report['traced_bytes']
+    assert 0 < len(report['top']) <= 5
+    assert isinstance(snapshot, tracemalloc.Snapshot)
+    assert not tracemalloc.is_tracing()
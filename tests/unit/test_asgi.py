@@ -0,0 +1,115 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from movie.asgi.asgi import wsgi_environ
+
+
+def call(app, path, query_string=b'', method='GET', body=b'', headers=()):
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'query_string': query_string,
+        'headers': list(headers), 'server': ('testserver', 80), 'client': ('127.0.0.1', 5000)
+    }
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = list()
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+
+    status = sent[0]['status']
+    body = b''.join(message.get('body', b'') for message in sent[1:])
+    return status, dict(sent[0]['headers']), body
+
+
+def test_asgi_app_serves_json_api(asgi_app):
+    status, headers, body = call(asgi_app, '/api/movies', b'genre=Sci-Fi&fields=id')
+
+    assert status == 200
+    assert headers[b'content-type'] == b'application/json'
+    assert json.loads(body)['movies'] == [{'id': 1}, {'id': 2}]
+
+
+def test_asgi_app_serves_flask_pages(asgi_app):
+    status, headers, body = call(asgi_app, '/movies_by_genre', b'genre=Horror')
+
+    assert status == 200
+    assert b'Split' in body
+
+
+def test_asgi_app_passes_request_bodies_to_flask(asgi_app):
+    status, headers, body = call(
+        asgi_app, '/authentication/login', method='POST',
+        body=b'username=thorke&password=wrong',
+        headers=[(b'content-type', b'application/x-www-form-urlencoded')]
+    )
+
+    assert status == 200
+    assert b'Password does not match supplied username' in body
+
+
+def test_wsgi_environ_joins_repeated_headers():
+    scope = {
+        'method': 'GET', 'path': '/', 'query_string': b'',
+        'headers': [(b'accept', b'text/html'), (b'accept', b'application/json'), (b'content-type', b'text/plain')]
+    }
+    environ = wsgi_environ(scope, b'')
+
+    assert environ['HTTP_ACCEPT'] == 'text/html,application/json'
+    assert environ['CONTENT_TYPE'] == 'text/plain'
+
+
+def test_asgi_app_streams_a_response_from_one_worker_thread(asgi_app):
+    # Flask keeps its contexts per thread, so a response streamed with stream_with_context must be produced start to
+    # finish on the thread that began it.
+    asgi_app.flask_app.config['EXPORT_BATCH_SIZE'] = 1
+
+    for _ in range(3):
+        status, headers, body = call(asgi_app, '/movies_by_genre/export', b'format=ndjson')
+
+        assert status == 200
+        assert len(body.splitlines()) == 5
+
+
+def test_asgi_app_answers_503_until_the_catalog_is_ready(asgi_app):
+    asgi_app.flask_app.extensions['catalog_loader']._ready.clear()
+
+    status, headers, body = call(asgi_app, '/api/movies', b'genre=Action')
+
+    assert status == 503
+    assert b'retry-after' in headers
+
+
+def test_asgi_app_frees_the_worker_before_sending_an_ordinary_response(asgi_app):
+    # With one worker, a client slow to read its response mustn't hold up the next request.
+    asgi_app._executor = ThreadPoolExecutor(max_workers=1)
+    scope = {
+        'type': 'http', 'method': 'GET', 'path': '/api/movies', 'query_string': b'genre=Horror',
+        'headers': [], 'server': ('testserver', 80), 'client': ('127.0.0.1', 5000)
+    }
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def serve():
+        client_reading = asyncio.Event()
+        sent = list()
+
+        async def slow_send(message):
+            await client_reading.wait()
+
+        async def send(message):
+            sent.append(message)
+
+        slow = asyncio.create_task(asgi_app(scope, receive, slow_send))
+        await asyncio.wait_for(asgi_app(scope, receive, send), timeout=5)
+        client_reading.set()
+        await slow
+        return sent
+
+    sent = asyncio.run(serve())
+    assert sent[0]['status'] == 200
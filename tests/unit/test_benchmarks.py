@@ -0,0 +1,55 @@
+import argparse
+import os
+
+import pytest
+
+from benchmarks.catalog import generate_catalog
+from benchmarks.loadtest import parse_mix, percentile, summarise
+from benchmarks.repository import compare
+from movie.adapters.memory_repository import MemoryRepository, populate
+
+
+def test_synthetic_catalog_is_deterministic_and_loads(tmp_path):
+    generate_catalog(str(tmp_path / 'first'), 200)
+    generate_catalog(str(tmp_path / 'second'), 200)
+
+    for filename in ('Data1000Movies.csv', 'users.csv', 'comments.csv'):
+        with open(os.path.join(tmp_path, 'first', filename), 'rb') as first, \
+                open(os.path.join(tmp_path, 'second', filename), 'rb') as second:
+            assert first.read() == second.read()
+
+    repo = MemoryRepository()
+    populate(str(tmp_path / 'first'), repo)
+    assert repo.get_number_of_movies() == 200
+    assert len(repo.get_reviews()) == 200
+    assert repo.get_user('user10') is not None
+
+
+def test_compare_flags_regressions():
+    baseline = {'benchmarks': {'1000': {'get_movie': 1e-6, 'get_user': 1e-6}}}
+    results = {'benchmarks': {'1000': {'get_movie': 1.1e-6, 'get_user': 2e-6, 'add_review': 1e-6}}}
+
+    lines = compare(results, baseline, threshold=0.25)
+
+    assert len(lines) == 2
+    assert not lines[0].endswith('REGRESSION')
+    assert lines[1].endswith('REGRESSION')
+
+
+def test_load_test_percentiles_and_summary():
+    latencies = {'movies': [i / 1000 for i in range(100, 0, -1)]}
+
+    report = summarise(latencies, {'movies': 2}, elapsed=10)
+
+    movies = report['routes']['movies']
+    assert movies['requests'] == 100
+    assert movies['errors'] == 2
+    assert movies['throughput_rps'] == 10
+    assert (movies['p50_ms'], movies['p95_ms'], movies['p99_ms']) == (50, 95, 99)
+    assert percentile([], 0.5) is None
+
+
+def test_load_test_mix():
+    assert parse_mix('movies=6,comment') == {'movies': 6, 'comment': 1}
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_mix('search=1')
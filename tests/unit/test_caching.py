@@ -0,0 +1,65 @@
+from jinja2 import Environment, DictLoader, FileSystemBytecodeCache
+
+from movie.caching.fragment import FragmentCacheExtension
+from movie.caching.templates import precompile_templates
+from movie.caching.lru import LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used_entry():
+    cache = LRUCache(2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+
+    # Touch 'a' so that 'b' becomes the least recently used entry.
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+
+    assert 'b' not in cache
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_lru_cache_counts_hits_and_misses():
+    cache = LRUCache(2)
+    cache.set('a', 1)
+    cache.get('a')
+    cache.get('missing')
+
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+
+
+def test_fragment_cache_skips_body_on_hit():
+    environment = Environment(
+        loader=DictLoader({'page': '{% cache "names", version %}{% for name in names() %}<b>{{ name }}</b>{% endfor %}'
+                                   '{% endcache %}'}),
+        extensions=[FragmentCacheExtension],
+        autoescape=True
+    )
+    calls = list()
+
+    def names():
+        calls.append(1)
+        return ['Action', 'Drama']
+
+    template = environment.get_template('page')
+    first = template.render(version=1, names=names)
+    second = template.render(version=1, names=names)
+
+    assert first == second == '<b>Action</b><b>Drama</b>'
+    assert len(calls) == 1
+
+    # A new catalog version renders the fragment again.
+    template.render(version=2, names=names)
+    assert len(calls) == 2
+
+
+def test_precompile_templates_fills_bytecode_cache(tmp_path):
+    environment = Environment(
+        loader=DictLoader({'a.html': '<p>{{ title }}</p>', 'b.html': '{% for x in xs %}{{ x }}{% endfor %}'}),
+        bytecode_cache=FileSystemBytecodeCache(str(tmp_path))
+    )
+
+    assert sorted(precompile_templates(environment)) == ['a.html', 'b.html']
+    assert len(list(tmp_path.iterdir())) == 2
@@ -0,0 +1,21 @@
+import gzip
+
+from movie.compression.compression import precompress_directory
+
+
+def test_precompress_directory_writes_gzip_variants(tmp_path):
+    stylesheet = tmp_path / 'main.css'
+    stylesheet.write_text('body { margin: 0; }\n' * 100)
+
+    written = precompress_directory(str(tmp_path))
+
+    assert written == [str(stylesheet) + '.gz']
+    assert gzip.decompress((tmp_path / 'main.css.gz').read_bytes()) == stylesheet.read_bytes()
+
+
+def test_precompress_directory_skips_files_gzip_does_not_shrink(tmp_path):
+    image = tmp_path / 'logo.png'
+    image.write_bytes(gzip.compress(bytes(range(256)) * 50))
+
+    assert precompress_directory(str(tmp_path)) == []
+    assert not (tmp_path / 'logo.png.gz').exists()
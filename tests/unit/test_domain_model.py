@@ -1,7 +1,7 @@
-from datetime import date
+from datetime import date, datetime
 
 from movie.domain.model import User, Movie, Genre, Review, ModelException, make_genre_association, \
-    make_actor_association, make_director_association, Actor, Director
+    make_actor_association, make_director_association, make_review, Actor, Director
 
 import pytest
 
@@ -86,3 +86,35 @@ def test_make_director_association(movie, director):
     assert movie in director._director_movies
 
 
+def test_make_review_tracks_latest_comment_timestamp(movie):
+    user = User('dbowie', '1234567890')
+    make_review('Loved it', user, movie, datetime(2020, 2, 28))
+    make_review('Watched it again', user, movie, datetime(2020, 2, 29))
+    make_review('An older note', user, movie, datetime(2020, 2, 1))
+
+    assert movie.number_of_comments == 3
+    assert movie.latest_comment_timestamp == datetime(2020, 2, 29)
+
+
+def test_make_review_timestamps_each_review_when_it_is_made(movie):
+    user = User('dbowie', '1234567890')
+    before = datetime.today()
+    review = make_review('Loved it', user, movie)
+
+    assert review.timestamp >= before
+
+
+def test_make_genre_association_twice_raises(movie, genre):
+    make_genre_association(movie, genre)
+
+    with pytest.raises(ModelException):
+        make_genre_association(movie, genre)
+
+
+def test_has_review_finds_reviews_made_earlier(movie, user):
+    first = make_review('Loved it', user, movie, datetime(2020, 2, 28))
+    make_review('Watched it again', user, movie, datetime(2020, 2, 29))
+
+    assert movie.has_comment(first)
+    assert user.has_review(first)
+    assert not movie.has_comment(Review(user, movie, 'Never added', datetime(2020, 3, 1)))
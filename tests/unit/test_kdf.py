@@ -0,0 +1,53 @@
+import threading
+
+import pytest
+
+from movie.authentication.kdf import KdfPool, KdfPoolBusyException
+
+
+@pytest.fixture
+def kdf_pool():
+    pool = KdfPool(max_workers=1, max_queue=1, method='pbkdf2:sha256:1000')
+    yield pool
+    pool.shutdown()
+
+
+def test_kdf_pool_hashes_and_checks_passwords(kdf_pool):
+    password_hash = kdf_pool.hash_password('CarelessWhisper1984')
+
+    assert password_hash.startswith('pbkdf2:sha256:1000$')
+    assert kdf_pool.check_password(password_hash, 'CarelessWhisper1984')
+    assert not kdf_pool.check_password(password_hash, 'LastChristmas1984')
+
+    stats = kdf_pool.stats()
+    assert stats['completed'] == 3
+    assert stats['in_flight'] == 0
+    assert stats['wait_seconds_max'] >= stats['wait_seconds_mean'] >= 0
+
+
+def test_kdf_pool_rejects_work_beyond_its_queue(kdf_pool):
+    release = threading.Event()
+    running = threading.Event()
+
+    def hash_slowly(password):
+        running.set()
+        release.wait(5)
+        return password
+
+    # One call runs and one waits in the queue, which fills the pool.
+    callers = [threading.Thread(target=kdf_pool._run, args=(hash_slowly, 'password')) for _ in range(2)]
+    for caller in callers:
+        caller.start()
+    running.wait(5)
+    while kdf_pool.stats()['in_flight'] < 2:
+        pass
+
+    with pytest.raises(KdfPoolBusyException):
+        kdf_pool.hash_password('CarelessWhisper1984')
+
+    release.set()
+    for caller in callers:
+        caller.join(5)
+    stats = kdf_pool.stats()
+    assert stats['rejected'] == 1
+    assert stats['completed'] == 2
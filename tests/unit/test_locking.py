@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+
+from movie.adapters.locking import ReadWriteLock
+
+
+def test_readers_share_the_lock():
+    lock = ReadWriteLock()
+    both_reading = threading.Barrier(2, timeout=5)
+
+    def read():
+        with lock.reading():
+            both_reading.wait()
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    read()
+    reader.join()
+
+
+def test_writer_waits_for_readers_and_blocks_new_readers():
+    lock = ReadWriteLock()
+    events = list()
+    writer_waiting = threading.Event()
+
+    def write():
+        writer_waiting.set()
+        with lock.writing():
+            events.append('write')
+
+    def read():
+        with lock.reading():
+            events.append('late read')
+
+    with lock.reading():
+        writer = threading.Thread(target=write)
+        writer.start()
+        writer_waiting.wait()
+        while not lock._writers_waiting:
+            pass
+
+        # A waiting writer goes before readers that arrive after it.
+        reader = threading.Thread(target=read)
+        reader.start()
+        events.append('read')
+
+    writer.join(5)
+    reader.join(5)
+    assert events == ['read', 'write', 'late read']
+
+
+def test_lock_is_reentrant():
+    lock = ReadWriteLock()
+
+    with lock.writing():
+        with lock.writing():
+            with lock.reading():
+                pass
+        with lock.reading():
+            with lock.reading():
+                pass
+
+    # The lock has been fully released, so another thread can write.
+    writer = threading.Thread(target=lambda: lock.writing().__enter__())
+    writer.start()
+    writer.join(5)
+    assert not writer.is_alive()
+
+
+def test_read_lock_cannot_be_upgraded():
+    lock = ReadWriteLock()
+
+    with lock.reading():
+        with pytest.raises(RuntimeError):
+            with lock.writing():
+                pass
+
+
+def test_writer_releasing_before_its_read_downgrades_to_a_reader():
+    lock = ReadWriteLock()
+    lock.acquire_write()
+    lock.acquire_read()
+    lock.release_write()
+
+    writer = threading.Thread(target=lambda: lock.writing().__enter__())
+    writer.start()
+    writer.join(0.1)
+    assert writer.is_alive()
+
+    lock.release_read()
+    writer.join(5)
+    assert not writer.is_alive()
+    assert lock._readers == 0
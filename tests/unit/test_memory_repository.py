@@ -1,3 +1,4 @@
+import threading
 from datetime import date, datetime
 from typing import List
 
@@ -5,6 +6,8 @@ import pytest
 
 from movie.domain.model import User, Movie, Review, Actor, Genre, make_review
 from movie.adapters.repository import RepositoryException
+from movie.adapters.memory_repository import MemoryRepository
+import movie.movies.services as movies_services
 
 
 def test_repository_can_add_a_user(in_memory_repo):
@@ -100,4 +103,79 @@ def test_repository_can_retrieve_comments(in_memory_repo):
     assert len(in_memory_repo.get_reviews()) == 3
 
 
+def test_repository_catalog_version_changes_when_catalog_changes(in_memory_repo):
+    version = in_memory_repo.get_catalog_version()
+    in_memory_repo.add_genre(Genre('Motoring'))
 
+    assert in_memory_repo.get_catalog_version() != version
+
+
+def test_repository_returns_sorted_movie_id_index(in_memory_repo):
+    assert in_memory_repo.get_movie_id_index() == (1, 2, 3, 4, 5)
+    assert in_memory_repo.get_movie_id_index('genre', 'Sci-Fi') == (1, 2)
+    assert in_memory_repo.get_movie_id_index('actor', 'Nobody') == ()
+
+
+def test_repository_returns_movies_and_missing_ids(in_memory_repo):
+    movies, missing_ids = in_memory_repo.get_movies_and_missing_ids([2, 9, 1, 0])
+
+    assert [movie.id for movie in movies] == [2, 1]
+    assert missing_ids == [9, 0]
+
+
+def test_repository_returns_comments_for_movie_in_timestamp_order(in_memory_repo):
+    user = in_memory_repo.get_user('thorke')
+    movie = in_memory_repo.get_movie(1)
+    comment = make_review('Seen it before it was cool', user, movie, datetime(2020, 1, 1))
+    in_memory_repo.add_review(comment)
+
+    comments = in_memory_repo.get_reviews_for_movie(1)
+    assert comments[0] is comment
+    assert [comment.comment for comment in in_memory_repo.get_reviews_for_movie(1, 1, 2)] == ['good movie', 'Yeah great']
+    assert in_memory_repo.get_reviews_for_movie(2) == []
+
+
+def test_catalog_loader_populates_repository_in_background(catalog_loader):
+    assert catalog_loader.status()['state'] == 'pending'
+
+    catalog_loader.start()
+
+    assert catalog_loader.wait(timeout=30)
+    status = catalog_loader.status()
+    assert status['state'] == 'ready'
+    assert status['movies'] == 5
+    assert status['reviews'] == 3
+
+
+def test_catalog_loader_calls_ready_callbacks_once_populated(catalog_loader):
+    calls = list()
+    catalog_loader.when_ready(lambda: calls.append(catalog_loader.status()['reviews']))
+    assert calls == []
+
+    catalog_loader.load()
+    catalog_loader.when_ready(lambda: calls.append('after'))
+
+    assert calls == [3, 'after']
+
+
+def test_repository_stays_consistent_under_concurrent_comments(in_memory_repo):
+    def add_comments():
+        for n in range(50):
+            movies_services.add_comment(1, f'Comment {n}', 'fmercury', in_memory_repo)
+
+    threads = [threading.Thread(target=add_comments) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(in_memory_repo.get_reviews()) == 3 + 200
+    assert len(in_memory_repo.get_reviews_for_movie(1)) == in_memory_repo.get_movie(1).number_of_comments
+
+
+def test_repository_without_locking():
+    repo = MemoryRepository(thread_safe=False)
+    repo.add_user(User('fmercury', '8734gfe2058v'))
+
+    with repo.writing():
+        assert repo.get_user('fmercury') is not None
@@ -0,0 +1,52 @@
+import threading
+
+from movie.diagnostics.metrics import Counter, Histogram, ThreadShards, sample
+
+
+def test_thread_shards_sum_rows_from_every_thread_including_finished_ones():
+    shards = ThreadShards(1)
+
+    def count():
+        for _ in range(1000):
+            shards.row(('movies_bp',))[0] += 1
+
+    threads = [threading.Thread(target=count) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    count()
+
+    assert shards.totals() == {('movies_bp',): [5000]}
+    # Only this thread's shard is still live; the others were folded together.
+    assert len(shards._shards) == 1
+
+
+def test_counter_exposition():
+    counter = Counter('http_requests_total', 'Requests answered.', ('endpoint', 'status'))
+    counter.inc('home_bp.home', 200)
+    counter.inc('home_bp.home', 200)
+
+    assert counter.expose() == [
+        '# HELP http_requests_total Requests answered.',
+        '# TYPE http_requests_total counter',
+        'http_requests_total{endpoint="home_bp.home",status="200"} 2'
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram('latency_seconds', 'Latency.', buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    assert histogram.expose()[2:] == [
+        'latency_seconds_bucket{le="0.1"} 2',
+        'latency_seconds_bucket{le="1.0"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        'latency_seconds_sum 3.65',
+        'latency_seconds_count 4'
+    ]
+
+
+def test_label_values_are_escaped():
+    assert sample('genre_total', {'genre': 'Sci "Fi"\\'}, 1) == 'genre_total{genre="Sci \\"Fi\\"\\\\"} 1'
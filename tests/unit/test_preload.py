@@ -0,0 +1,38 @@
+import gc
+import os
+
+import pytest
+
+from movie.preload.memory import parse_smaps_rollup, process_memory
+from movie.preload.preload import freeze_for_fork
+
+
+SMAPS_ROLLUP = """5577d7be5000-7ffe8ac42000 ---p 00000000 00:00 0                          [rollup]
+Rss:                1248 kB
+Pss:                 433 kB
+Shared_Clean:       1104 kB
+Shared_Dirty:          0 kB
+Private_Clean:        40 kB
+Private_Dirty:       104 kB
+"""
+
+
+def test_parse_smaps_rollup():
+    assert parse_smaps_rollup(SMAPS_ROLLUP) == {'rss_kb': 1248, 'pss_kb': 433, 'shared_kb': 1104, 'private_kb': 144}
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/smaps_rollup'), reason='requires /proc/<pid>/smaps_rollup')
+def test_process_memory_of_this_process():
+    memory = process_memory(os.getpid())
+
+    assert memory['pid'] == os.getpid()
+    assert memory['rss_kb'] == memory['shared_kb'] + memory['private_kb']
+
+
+def test_freeze_for_fork_builds_indexes_and_freezes_objects(in_memory_repo):
+    try:
+        assert freeze_for_fork(in_memory_repo) > 0
+        assert ('genre', 'Action') in in_memory_repo._movie_id_indexes
+        assert ('director', 'James Gunn') in in_memory_repo._movie_id_indexes
+    finally:
+        gc.unfreeze()
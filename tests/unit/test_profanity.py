@@ -0,0 +1,73 @@
+import pytest
+
+from better_profanity import profanity
+
+from movie.movies.profanity import ProfanityFilter, get_profanity_filter
+
+
+@pytest.fixture
+def small_filter():
+    return ProfanityFilter(['shit', 'deep throat'], {'i': ('i', '1', '*'), 's': ('s', '$'), 'o': ('o', '0')})
+
+
+def test_filter_matches_listed_words_and_their_variants(small_filter):
+    assert small_filter.contains_profanity('What a load of shit')
+    assert small_filter.contains_profanity('SHIT!')
+    assert small_filter.contains_profanity('$h1t happens')
+    assert small_filter.contains_profanity('sh*t')
+
+
+def test_filter_matches_whole_words_only(small_filter):
+    assert not small_filter.contains_profanity('shitake mushrooms')
+    assert not small_filter.contains_profanity('bullshitter')
+    assert not small_filter.contains_profanity('A fine film')
+
+
+def test_filter_matches_phrases_and_spaced_out_words(small_filter):
+    assert small_filter.contains_profanity('Deep thr0at')
+    assert not small_filter.contains_profanity('deep, throat')
+    assert small_filter.contains_profanity('sh-it')
+
+
+def test_filter_looks_as_far_ahead_as_the_longest_phrase(small_filter):
+    assert small_filter.max_separators == 1
+    assert small_filter.contains_profanity('sh it')
+    assert not small_filter.contains_profanity('s h it')
+
+
+@pytest.mark.parametrize('comment', (
+        'Who thinks Trump is a fuckwit?',
+        'This movie is sh1t, and the sequel is b*llsh*t',
+        'a$$hole director',
+        'Loved the class and the bass line, would assess it again',
+        'Pure cinema from start to finish.',
+        'Scunthorpe United',
+))
+def test_default_filter_agrees_with_better_profanity(comment):
+    assert get_profanity_filter().contains_profanity(comment) == profanity.contains_profanity(comment)
+
+
+# Comments mixing listed words, leetspeak, phrases and spaced-out words with clean text, at the start, middle and end.
+CORPUS = [
+    f'{before}{word}{after}'
+    for word in ('fuck', 'sh1t', 'a$$hole', 'deep throat', 'deep  throat', 'f u c k', 'f-u-c-k', 's h i t', 'fu ck',
+                 'sh it', 'b*llsh*t', 'class', 'assess', 'Scunthorpe', 'shitake', 'c u t e', 'f u n')
+    for before in ('', 'What a ', 'This is, ')
+    for after in ('', ' film', '!', '. Really ', ' s')
+]
+
+# better_profanity doesn't read a one-character word that ends the text, so it misses a word spelt out up to the
+# very end. The compiled filter matches those too.
+SPELT_OUT_AT_THE_END = {'f u c k', 'f-u-c-k', 's h i t', 'What a f u c k', 'What a f-u-c-k', 'What a s h i t',
+                        'This is, f u c k', 'This is, f-u-c-k', 'This is, s h i t'}
+
+
+def test_default_filter_differs_from_better_profanity_only_on_words_spelt_out_at_the_end():
+    profanity_filter = get_profanity_filter()
+    differences = {
+        comment for comment in CORPUS
+        if profanity_filter.contains_profanity(comment) != profanity.contains_profanity(comment)
+    }
+
+    assert differences == SPELT_OUT_AT_THE_END
+    assert all(profanity_filter.contains_profanity(comment) for comment in differences)
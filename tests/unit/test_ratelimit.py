@@ -0,0 +1,33 @@
+from movie.ratelimit.ratelimit import MemoryBucketStore
+
+
+def test_bucket_allows_a_burst_then_refills_at_its_rate(clock):
+    store = MemoryBucketStore(clock=clock)
+
+    assert [store.take('client', 0.5, 3) for _ in range(3)] == [0, 0, 0]
+    assert store.take('client', 0.5, 3) == 2.0
+
+    clock.now += 1
+    assert store.take('client', 0.5, 3) == 1.0
+    clock.now += 1
+    assert store.take('client', 0.5, 3) == 0
+
+    # Other clients have their own buckets.
+    assert store.take('another client', 0.5, 3) == 0
+
+
+def test_bucket_never_holds_more_than_its_burst(clock):
+    store = MemoryBucketStore(clock=clock)
+    store.take('client', 1, 2)
+
+    clock.now += 1000
+    assert [store.take('client', 1, 2) for _ in range(3)] == [0, 0, 1.0]
+
+
+def test_store_forgets_least_recently_seen_clients(clock):
+    store = MemoryBucketStore(maxsize=1, clock=clock)
+    store.take('client', 1, 1)
+    store.take('another client', 1, 1)
+
+    # The first client's bucket was evicted, so it starts full again.
+    assert store.take('client', 1, 1) == 0
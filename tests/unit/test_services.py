@@ -6,6 +6,8 @@ from movie.authentication.services import AuthenticationException
 
 from movie.authentication import services as auth_services
 from movie.movies import services as movies_services
+from movie.api import services as api_services
+from movie.movies import export
 
 
 def test_can_add_user(in_memory_repo):
@@ -103,3 +105,136 @@ def test_get_movies_by_id(in_memory_repo):
     # Check that 2 articles were returned from the query.
     assert len(target_movies_ids) == 4
 
+
+def test_flat_movie_dict_contains_only_requested_fields(in_memory_repo):
+    fields = api_services.parse_fields('id,title,genres')
+    movie_as_dict = api_services.get_movie(1, fields, in_memory_repo)
+
+    assert movie_as_dict == {
+        'id': 1,
+        'title': 'Guardians of the Galaxy',
+        'genres': ['Action', 'Adventure', 'Sci-Fi']
+    }
+
+
+def test_flat_movie_dict_omits_comments_by_default(in_memory_repo):
+    movie_as_dict = api_services.get_movie(1, api_services.parse_fields(None), in_memory_repo)
+
+    assert 'comments' not in movie_as_dict
+    assert movie_as_dict['number_of_comments'] == 3
+    assert movie_as_dict['directors'] == ['James Gunn']
+
+
+def test_cannot_request_unknown_fields():
+    with pytest.raises(api_services.UnknownFieldException):
+        api_services.parse_fields('id,budget')
+
+
+def test_get_movie_listings_by_id(in_memory_repo):
+    listings = movies_services.get_movie_listings_by_id([1, 2, 99], in_memory_repo)
+
+    assert [listing.id for listing in listings] == [1, 2]
+    assert listings[0].title == 'Guardians of the Galaxy'
+    assert listings[0].genres == [{'name': 'Action'}, {'name': 'Adventure'}, {'name': 'Sci-Fi'}]
+    assert listings[0].number_of_comments == 3
+
+
+def test_movie_listing_supports_page_urls(in_memory_repo):
+    listing = movies_services.get_movie_listing(1, in_memory_repo)
+    listing['add_comment_url'] = '/comment_on_movie?movie=1'
+
+    assert listing['add_comment_url'] == '/comment_on_movie?movie=1'
+    assert listing['id'] == 1
+    with pytest.raises(KeyError):
+        listing['view_comment_url']
+
+
+def test_get_movie_ids_page_walks_forwards_and_backwards(in_memory_repo):
+    page = movies_services.get_movie_ids_page('', '', '', in_memory_repo, per_page=2)
+    assert page.movie_ids == [1, 2]
+    assert not page.has_previous and page.has_next
+
+    cursor = movies_services.encode_cursor('after', page.movie_ids[-1])
+    page = movies_services.get_movie_ids_page('', '', '', in_memory_repo, cursor=cursor, per_page=2)
+    assert page.movie_ids == [3, 4]
+    assert page.has_previous and page.has_next
+
+    cursor = movies_services.encode_cursor('before', page.movie_ids[0])
+    page = movies_services.get_movie_ids_page('', '', '', in_memory_repo, cursor=cursor, per_page=2)
+    assert page.movie_ids == [1, 2]
+
+
+def test_get_movie_ids_page_for_last_page(in_memory_repo):
+    cursor = movies_services.encode_cursor('before')
+    page = movies_services.get_movie_ids_page('', '', '', in_memory_repo, cursor=cursor, per_page=2)
+
+    assert page.movie_ids == [4, 5]
+    assert page.has_previous and not page.has_next
+
+
+def test_get_movie_ids_page_with_filters(in_memory_repo):
+    page = movies_services.get_movie_ids_page('Sci-Fi', '', 'Ridley Scott', in_memory_repo, per_page=2)
+
+    assert page.movie_ids == [2]
+    assert movies_services.get_number_of_search_results('Sci-Fi', '', 'Ridley Scott', in_memory_repo) == 1
+
+
+def test_malformed_cursor_addresses_the_first_page():
+    assert movies_services.decode_cursor('not a cursor') == ('after', None)
+    assert movies_services.decode_cursor(movies_services.encode_cursor('after', 12)) == ('after', 12)
+
+
+def test_iter_search_results_walks_every_batch(in_memory_repo):
+    movies = movies_services.iter_search_results('', '', '', in_memory_repo, batch_size=2)
+
+    assert [movie.id for movie in movies] == [1, 2, 3, 4, 5]
+
+
+def test_export_rows_as_csv_in_chunks(in_memory_repo):
+    movies = movies_services.iter_search_results('Sci-Fi', '', '', in_memory_repo)
+    chunks = list(export.export_rows(movies, ('id', 'title', 'genres'), 'csv', rows_per_chunk=2))
+
+    assert chunks == [
+        'id,title,genres\r\n1,Guardians of the Galaxy,Action|Adventure|Sci-Fi\r\n',
+        '2,Prometheus,Adventure|Sci-Fi|Mystery\r\n'
+    ]
+
+
+def test_batch_get_movies_reports_missing_ids(in_memory_repo):
+    fields = api_services.parse_fields('id,title')
+    movies_as_dict, missing_ids = api_services.batch_get_movies([3, 42, 3], fields, 10, in_memory_repo)
+
+    assert movies_as_dict == [{'id': 3, 'title': 'Split'}, {'id': 3, 'title': 'Split'}]
+    assert movies_as_dict[0] is movies_as_dict[1]
+    assert missing_ids == [42]
+
+
+def test_cannot_batch_get_too_many_movies(in_memory_repo):
+    with pytest.raises(api_services.InvalidBatchException):
+        api_services.batch_get_movies([1, 2, 3], api_services.parse_fields(None), 2, in_memory_repo)
+
+    with pytest.raises(api_services.InvalidBatchException):
+        api_services.batch_get_movies(['1'], api_services.parse_fields(None), 2, in_memory_repo)
+
+
+def test_get_comments_page(in_memory_repo):
+    comments_page = movies_services.get_comments_page(1, 0, 2, in_memory_repo)
+
+    assert [comment['comment_text'] for comment in comments_page['comments']] == ['good movie', 'Yeah great']
+    assert comments_page['number_of_comments'] == 3
+    assert comments_page['next_start'] == 2
+
+    comments_page = movies_services.get_comments_page(1, 2, 2, in_memory_repo)
+    assert [comment['comment_text'] for comment in comments_page['comments']] == ['awesome!']
+    assert comments_page['next_start'] is None
+
+
+def test_api_comments_page_is_the_movies_comments_page_serialized_flat(in_memory_repo):
+    comments_page = api_services.get_comments_page(1, 0, 2, in_memory_repo)
+
+    comments = in_memory_repo.get_reviews_for_movie(1, 0, 2)
+    assert comments_page['comments'] == api_services.comments_to_flat_dict(comments)
+    assert comments_page['next_start'] == 2
+
+    with pytest.raises(movies_services.NonExistentMovieException):
+        api_services.get_comments_page(99, 0, 2, in_memory_repo)
@@ -0,0 +1,35 @@
+from movie.diagnostics.startup import StartupTimer
+from movie.diagnostics.startup_report import parse_import_times
+
+
+def test_startup_timer_records_phases_in_the_order_they_started(clock):
+    timer = StartupTimer(clock)
+
+    timer.start_phase('config')
+    clock.now += 0.5
+    timer.start_phase('populate')
+    clock.now += 2.0
+    # The loader reports a phase of populating as it ends.
+    timer.populate_listener('movies', 1.5)
+    clock.now += 0.25
+    timer.finish()
+
+    report = timer.report()
+    assert report['create_app_seconds'] == 2.75
+    assert [(phase['name'], phase['start_seconds'], phase['seconds']) for phase in report['phases']] == [
+        ('config', 0.0, 0.5), ('populate', 0.5, 2.25), ('populate.movies', 1.0, 1.5)
+    ]
+
+
+def test_parse_import_times():
+    stderr = '\n'.join([
+        'import time: self [us] | cumulative | imported package',
+        'import time:       120 |        120 |   _io',
+        'import time:       300 |       1500 | flask',
+        'some other output'
+    ])
+
+    assert parse_import_times(stderr) == [
+        {'module': '_io', 'depth': 1, 'self_us': 120, 'cumulative_us': 120},
+        {'module': 'flask', 'depth': 0, 'self_us': 300, 'cumulative_us': 1500}
+    ]
@@ -0,0 +1,30 @@
+from flask import Flask, g
+
+from movie.diagnostics.timing import RequestTimer, phase, report_timing
+
+
+def test_request_timer_accumulates_repeated_phases(clock):
+    timer = RequestTimer(clock)
+
+    for seconds in (0.002, 0.003):
+        with timer.phase('sidebar'):
+            clock.now += seconds
+    with timer.phase('render'):
+        clock.now += 0.010
+
+    assert timer.header(timer.elapsed()) == 'sidebar;dur=5.00, render;dur=10.00, total;dur=15.00'
+
+
+def test_phase_does_nothing_when_the_request_is_not_timed():
+    app = Flask(__name__)
+    with app.test_request_context():
+        with phase('render'):
+            pass
+
+        assert g.get('request_timer') is None
+        response = report_timing(app.response_class('page'))
+        assert 'Server-Timing' not in response.headers
+
+    # Outside a request too, e.g. in a CLI command.
+    with phase('render'):
+        pass
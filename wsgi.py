@@ -4,5 +4,5 @@ from movie import create_app
 app = create_app()
 
 if __name__ == "__main__":
-    app.run(host='localhost', port=5000, threaded=False)
+    app.run(host='localhost', port=5000, threaded=app.config['REPOSITORY_THREAD_SAFE'])
 